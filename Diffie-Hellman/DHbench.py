@@ -0,0 +1,157 @@
+#!/usr/bin/python3
+#--------------------------------------------------------------------------------------------------
+# DHbench times the three parts of a Diffie-Hellman exchange on their own for a sweep of modulus
+#    and private key sizes: making the Program Prime, making a public key and making the shared
+#    key. Results are written as JSON and CSV with the median and percentiles, and can be compared
+#    against a saved baseline JSON file to spot regressions.
+#
+#                                                                      Writen by: Patrick Rainbolt
+#--------------------------------------------------------------------------------------------------
+import argparse
+import csv
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+
+# Small primes for trial division before running Miller-Rabin.
+first_primes_list = [p for p in range(3, 2000) if all(p % d for d in range(2, int(p ** 0.5) + 1))]
+first_primes_product = math.prod(first_primes_list)
+
+# Fields written for each result row, in CSV column order.
+Fields = ["phase", "modulus_bits", "exponent_bits", "samples", "median_ms", "mean_ms", "min_ms",
+          "p90_ms", "p95_ms", "p99_ms", "max_ms"]
+
+
+# Miller-Rabin probable prime test.
+def isMillerRabinPassed(mrc, rounds=20):
+    ec = mrc - 1
+    maxDivisionsByTwo = 0
+    while ec % 2 == 0:
+        ec >>= 1
+        maxDivisionsByTwo += 1
+    for i in range(rounds):
+        x = pow(random.randrange(2, mrc - 1), ec, mrc)
+        if x == 1 or x == mrc - 1: continue
+        for j in range(maxDivisionsByTwo - 1):
+            x = x * x % mrc
+            if x == mrc - 1: break
+        else:
+            return False
+    return True
+
+# Random prime with exactly num bits.
+def getPrime(num):
+    while True:
+        candidate = random.getrandbits(num) | (1 << (num - 1)) | 1
+        if math.gcd(candidate, first_primes_product) != 1: continue
+        if isMillerRabinPassed(candidate): return candidate
+
+# Median, mean and percentiles of a list of times in seconds, reported in milliseconds.
+def summarize(phase, modulusBits, exponentBits, times):
+    ms = sorted(t * 1000 for t in times)
+    if len(ms) > 1: cuts = statistics.quantiles(ms, n=100, method="inclusive")
+    else: cuts = ms * 99
+    return {"phase": phase, "modulus_bits": modulusBits, "exponent_bits": exponentBits, "samples": len(ms),
+            "median_ms": statistics.median(ms), "mean_ms": statistics.fmean(ms), "min_ms": ms[0],
+            "p90_ms": cuts[89], "p95_ms": cuts[94], "p99_ms": cuts[98], "max_ms": ms[-1]}
+
+# Times fn() samples times, returns the list of times in seconds.
+def timeSamples(fn, samples):
+    times = []
+    for i in range(samples):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+# Runs the sweep and returns the result rows.
+def runSweep(modulusSizes, exponentSizes, samples, primeSamples, primeMaxBits, quiet=False):
+    rows = []
+    for modulusBits in modulusSizes:
+        if modulusBits <= primeMaxBits and primeSamples > 0:
+            rows.append(summarize("prime", modulusBits, None, timeSamples(lambda: getPrime(modulusBits), primeSamples)))
+            if not quiet: printRow(rows[-1])
+
+        # pow() costs the same for any odd modulus of a size, so a random one stands in for a prime.
+        modulus = random.getrandbits(modulusBits) | (1 << (modulusBits - 1)) | 1
+        for exponentSize in exponentSizes:
+            exponentBits = modulusBits if exponentSize == "full" else min(int(exponentSize), modulusBits)
+            peer = pow(2, random.getrandbits(exponentBits), modulus)
+            rows.append(summarize("public", modulusBits, exponentBits,
+                                  timeSamples(lambda: pow(2, random.getrandbits(exponentBits), modulus), samples)))
+            if not quiet: printRow(rows[-1])
+            rows.append(summarize("shared", modulusBits, exponentBits,
+                                  timeSamples(lambda: pow(peer, random.getrandbits(exponentBits), modulus), samples)))
+            if not quiet: printRow(rows[-1])
+    return rows
+
+def printRow(row):
+    print(row["phase"].ljust(8) + str(row["modulus_bits"]).rjust(7) + str(row["exponent_bits"] or "-").rjust(7) +
+          str(row["samples"]).rjust(8) + ("%.3f" % row["median_ms"]).rjust(12) + ("%.3f" % row["p90_ms"]).rjust(12) +
+          ("%.3f" % row["p99_ms"]).rjust(12) + ("%.3f" % row["max_ms"]).rjust(12))
+    sys.stdout.flush()
+
+# Compares the medians against a baseline run. Returns the rows that got slower than the threshold.
+def compareBaseline(rows, baseline, threshold):
+    old = {(r["phase"], r["modulus_bits"], r["exponent_bits"]): r for r in baseline["results"]}
+    regressions = []
+    print("\nAgainst baseline (" + str(baseline.get("created", "unknown date")) + ")")
+    print("Phase     Bits    Exp    Base ms     New ms    Change")
+    print("-" * 54)
+    for row in rows:
+        key = (row["phase"], row["modulus_bits"], row["exponent_bits"])
+        if key not in old: continue
+        change = row["median_ms"] / old[key]["median_ms"] - 1
+        flag = "  SLOWER" if change > threshold else ""
+        if change > threshold: regressions.append(row)
+        print(row["phase"].ljust(8) + str(row["modulus_bits"]).rjust(7) + str(row["exponent_bits"] or "-").rjust(7) +
+              ("%.3f" % old[key]["median_ms"]).rjust(11) + ("%.3f" % row["median_ms"]).rjust(11) +
+              ("%+.1f%%" % (change * 100)).rjust(10) + flag)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diffie-Hellman benchmark across modulus and private key sizes.")
+    parser.add_argument('--bits', nargs='+', type=int, default=[512, 1024, 2048, 3072, 4096, 8192], help='Modulus sizes in bits')
+    parser.add_argument('--exponents', nargs='+', default=["256", "full"], help='Private key sizes in bits, "full" is the modulus size')
+    parser.add_argument('--samples', type=int, default=20, help='Timings per public/shared measurement (default: 20)')
+    parser.add_argument('--prime-samples', type=int, default=5, help='Primes made per modulus size (default: 5)')
+    parser.add_argument('--prime-max-bits', type=int, default=2048, help='Largest modulus to time prime generation for (default: 2048)')
+    parser.add_argument('--seed', type=int, help='Seed the random generator')
+    parser.add_argument('--json', help='Write the results to this JSON file')
+    parser.add_argument('--csv', help='Write the results to this CSV file')
+    parser.add_argument('--baseline', help='Compare against a JSON file from an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Median slowdown counted as a regression (default: 0.10)')
+    args = parser.parse_args()
+    if args.seed is not None: random.seed(args.seed)
+
+    print("Phase     Bits    Exp Samples   Median ms      p90 ms      p99 ms      Max ms")
+    print("-" * 78)
+    rows = runSweep(args.bits, args.exponents, args.samples, args.prime_samples, args.prime_max_bits)
+    output = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+              "machine": platform.machine(), "seed": args.seed, "results": rows}
+
+    if args.json:
+        f = open(args.json, "w")
+        json.dump(output, f, indent=2)
+        f.close()
+    if args.csv:
+        f = open(args.csv, "w", newline="")
+        writer = csv.DictWriter(f, fieldnames=Fields)
+        writer.writeheader()
+        writer.writerows(rows)
+        f.close()
+    if args.baseline:
+        f = open(args.baseline, "r")
+        baseline = json.load(f)
+        f.close()
+        if compareBaseline(rows, baseline, args.threshold): sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
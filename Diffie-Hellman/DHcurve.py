@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+#--------------------------------------------------------------------------------------------------
+# DHcurve is the elliptic curve (X25519) version of the Diffie-Hellman key exchange. It uses the
+#    cryptography package, and keys are handled as plain integers so the demos can print them the
+#    same way as the modular keys. Running it on its own compares key generation and key agreement
+#    times against the modular groups in DHgroups.py.
+#
+#                                                                      Writen by: Patrick Rainbolt
+#--------------------------------------------------------------------------------------------------
+import argparse
+import random
+import statistics
+import time
+
+# THIRD-PARTY IMPORTS (requires: pip install cryptography)
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
+from cryptography.hazmat.primitives import serialization
+
+# Curve25519 field prime and the u-coordinate of its base point, shown in place of prime and root.
+CURVES = {"x25519": (2**255 - 19, 9)}
+
+# Raw 32 byte little endian encoding used for both private and public keys.
+RawFormat = (serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+
+
+# Returns the (prime, base point) pair for a curve name.
+def getCurve(name):
+    if name not in CURVES:
+        raise ValueError("Unknown curve: " + str(name))
+    return CURVES[name]
+
+# New private key as an integer. Uses the random module so a seeded run can be reproduced.
+def getPrivateKey():
+    return random.getrandbits(256)
+
+# Public key (u-coordinate) for a private key integer.
+def getPublicKey(privateKey):
+    key = X25519PrivateKey.from_private_bytes(privateKey.to_bytes(32, "little"))
+    return int.from_bytes(key.public_key().public_bytes(*RawFormat), "little")
+
+# Shared key from the other party's public key and our private key.
+def getSharedKey(publicKey, privateKey):
+    key = X25519PrivateKey.from_private_bytes(privateKey.to_bytes(32, "little"))
+    return int.from_bytes(key.exchange(X25519PublicKey.from_public_bytes(publicKey.to_bytes(32, "little"))), "little")
+
+
+# Times fn() count times and returns the median in milliseconds.
+def medianTime(fn, count):
+    times = []
+    for i in range(count):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+# Side by side benchmark of key generation and key agreement, X25519 against the modular groups.
+def benchmark(groups, count, exponentBits):
+    import DHgroups
+    print("Method             Keygen ms   Agree ms   Keygen/s   Agree/s")
+    print("-" * 62)
+
+    peer = getPublicKey(getPrivateKey())
+    keygen = medianTime(lambda: getPublicKey(getPrivateKey()), count)
+    agree = medianTime(lambda: getSharedKey(peer, getPrivateKey()), count)
+    rows = [("x25519", keygen, agree)]
+
+    for name in groups:
+        prime, root = DHgroups.getGroup(name)
+        engine = DHgroups.loadTable(name)
+        bits = exponentBits or prime.bit_length()
+        peer = pow(root, random.getrandbits(bits), prime)
+        rows.append((name + " pow", medianTime(lambda: pow(root, random.getrandbits(bits), prime), count),
+                     medianTime(lambda: pow(peer, random.getrandbits(bits), prime), count)))
+        rows.append((name + " table", medianTime(lambda: engine.pow(random.getrandbits(bits)), count), rows[-1][2]))
+
+    for method, keygen, agree in rows:
+        print(method.ljust(16) + ("%.3f" % keygen).rjust(11) + ("%.3f" % agree).rjust(11) +
+              ("%.0f" % (1000 / keygen)).rjust(11) + ("%.0f" % (1000 / agree)).rjust(10))
+
+
+if __name__ == "__main__":
+    import DHgroups
+    parser = argparse.ArgumentParser(description="X25519 against modular Diffie-Hellman benchmark.")
+    parser.add_argument('--groups', nargs='+', default=["modp2048", "modp3072", "modp4096"], choices=DHgroups.groupNames(), help='Modular groups to compare against')
+    parser.add_argument('--count', type=int, default=50, help='Timings per measurement')
+    parser.add_argument('--exponent-bits', type=int, help='Private key size for the modular groups (default: group size)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the private keys')
+    args = parser.parse_args()
+    random.seed(args.seed)
+    benchmark(args.groups, args.count, args.exponent_bits)
@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+#--------------------------------------------------------------------------------------------------
+# DHfixedbase is a fixed base exponentiation engine for Diffie-Hellman. Every public key in a group
+#    is root ^ PrivateKey mod prime with the same root and prime, so the powers of the root can be
+#    worked out once, stored, and reused. With a window of w bits the table holds
+#    root ^ (d * 2^(w*i)) mod prime for every digit d, and a public key then costs one
+#    multiplication per nonzero w bit digit of the private key with no squaring at all.
+#
+#                                                                      Writen by: Patrick Rainbolt
+#--------------------------------------------------------------------------------------------------
+import argparse
+import hashlib
+import os
+import random
+import struct
+import time
+
+# Default window size in bits: 4 keeps a 4096-bit table under 8 MB.
+DefaultWindow = 4
+
+# Table file layout: magic, window, exponent bits, entry width, sha256(root + prime), entries.
+TableMagic = b"DHFB"
+TableHeader = struct.Struct(">4sBII32s")
+
+
+class FixedBase:
+    def __init__(self, root, prime, window=DefaultWindow, bits=None, table=None):
+        self.root = root % prime
+        self.prime = prime
+        self.window = window
+        self.bits = bits or prime.bit_length()
+        self.table = table if table is not None else self.build()
+
+    # Builds one row per window: row i holds root ^ (d * 2^(w*i)) for d = 1 .. 2^w - 1.
+    def build(self):
+        table = []
+        base = self.root
+        for i in range((self.bits + self.window - 1) // self.window):
+            row = [base]
+            for d in range(2, 1 << self.window):
+                row.append(row[-1] * base % self.prime)
+            table.append(row)
+            base = row[-1] * base % self.prime
+        return table
+
+    # root ^ exponent mod prime. Exponents bigger than the table fall back to the builtin pow.
+    def pow(self, exponent):
+        if exponent < 0 or exponent.bit_length() > self.bits:
+            return pow(self.root, exponent, self.prime)
+        prime = self.prime
+        mask = (1 << self.window) - 1
+        result = 1
+        for row in self.table:
+            if not exponent: break
+            digit = exponent & mask
+            if digit: result = result * row[digit - 1] % prime
+            exponent >>= self.window
+        return result
+
+    # Fingerprint of the (root, prime) pair so a stored table is never used with the wrong group.
+    def fingerprint(self):
+        return hashlib.sha256(str(self.root).encode() + b":" + str(self.prime).encode()).digest()
+
+    # Writes the table to disk, replacing any older copy in one step.
+    def save(self, fileName):
+        width = (self.prime.bit_length() + 7) // 8
+        folder = os.path.dirname(fileName)
+        if folder and not os.path.exists(folder): os.makedirs(folder)
+        f = open(fileName + ".tmp", "wb")
+        f.write(TableHeader.pack(TableMagic, self.window, self.bits, width, self.fingerprint()))
+        for row in self.table:
+            f.write(b"".join(value.to_bytes(width, "big") for value in row))
+        f.close()
+        os.replace(fileName + ".tmp", fileName)
+
+    # Reads a stored table back. Returns None if the file is missing or is not for this group.
+    @classmethod
+    def load(cls, fileName, root, prime, window=DefaultWindow, bits=None):
+        if not os.path.exists(fileName): return None
+        engine = cls(root, prime, window, bits, table=[])
+        width = (prime.bit_length() + 7) // 8
+        rowCount = (engine.bits + window - 1) // window
+        rowSize = ((1 << window) - 1) * width
+
+        f = open(fileName, "rb")
+        data = f.read()
+        f.close()
+        if len(data) != TableHeader.size + rowCount * rowSize: return None
+        magic, inWindow, inBits, inWidth, inPrint = TableHeader.unpack_from(data)
+        if (magic, inWindow, inBits, inWidth, inPrint) != (TableMagic, window, engine.bits, width, engine.fingerprint()):
+            return None
+
+        view = memoryview(data)[TableHeader.size:]
+        for i in range(rowCount):
+            rowData = view[i * rowSize:(i + 1) * rowSize]
+            engine.table.append([int.from_bytes(rowData[j:j + width], "big") for j in range(0, rowSize, width)])
+        return engine
+
+
+# Loads a stored table, building and storing it first if there is not one yet.
+def loadOrBuild(fileName, root, prime, window=DefaultWindow, bits=None):
+    engine = FixedBase.load(fileName, root, prime, window, bits)
+    if engine is None:
+        engine = FixedBase(root, prime, window, bits)
+        engine.save(fileName)
+    return engine
+
+
+# Benchmark: fixed base tables against the builtin pow at 1024, 2048 and 4096 bits.
+def benchmark(groups, windows, count, folder):
+    import DHgroups
+    print("Group        Bits  Window   Build(s)   Load(s)   Table MB    pow() ms   Table ms   Speedup")
+    print("-" * 92)
+    for name in groups:
+        prime, root = DHgroups.getGroup(name)
+        keys = [random.randrange(2, prime - 1) for i in range(count)]
+
+        start = time.perf_counter()
+        for key in keys: expected = pow(root, key, prime)
+        powTime = (time.perf_counter() - start) / count
+
+        for window in windows:
+            fileName = folder + "/" + name + ".w" + str(window) + ".bench"
+            start = time.perf_counter()
+            engine = FixedBase(root, prime, window)
+            buildTime = time.perf_counter() - start
+            engine.save(fileName)
+            start = time.perf_counter()
+            engine = FixedBase.load(fileName, root, prime, window)
+            loadTime = time.perf_counter() - start
+            tableSize = os.path.getsize(fileName) / (1024 * 1024)
+            os.remove(fileName)
+
+            start = time.perf_counter()
+            for key in keys: engine.pow(key)
+            tableTime = (time.perf_counter() - start) / count
+            if engine.pow(keys[-1]) != expected:
+                raise ValueError("Fixed base result does not match pow() for " + name)
+
+            print(name.ljust(10) + str(prime.bit_length()).rjust(6) + str(window).rjust(8) +
+                  ("%.3f" % buildTime).rjust(11) + ("%.3f" % loadTime).rjust(10) + ("%.1f" % tableSize).rjust(11) +
+                  ("%.3f" % (powTime * 1000)).rjust(12) + ("%.3f" % (tableTime * 1000)).rjust(11) +
+                  ("%.2fx" % (powTime / tableTime)).rjust(10))
+
+
+if __name__ == "__main__":
+    import DHgroups
+    parser = argparse.ArgumentParser(description="Fixed base exponentiation tables for Diffie-Hellman groups.")
+    parser.add_argument('--groups', nargs='+', default=["modp1024", "modp2048", "modp4096"], choices=DHgroups.groupNames(), help='Groups to benchmark')
+    parser.add_argument('--windows', nargs='+', type=int, default=[1, 2, 4, 6], help='Window sizes in bits to benchmark')
+    parser.add_argument('--count', type=int, default=50, help='Public keys computed per timing')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the private keys')
+    args = parser.parse_args()
+    random.seed(args.seed)
+    benchmark(args.groups, args.windows, args.count, DHgroups.DefaultCacheFolder)
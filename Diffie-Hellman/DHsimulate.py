@@ -0,0 +1,215 @@
+#!/usr/bin/python3
+#--------------------------------------------------------------------------------------------------
+# DHsimulate runs Diffie-Hellman key agreement between N parties instead of just Alice and Bob, and
+#    spreads the work over a process pool. It is used as a load model for the key exchange layer.
+#
+#    pairs  Every party agrees a shared key with every other party: N*(N-1) exponentiations.
+#    tree   Tree based group key agreement (TGDH). Parties are the leaves of a binary tree, each
+#           inner node key is the Diffie-Hellman key of its two children, and the root is the group
+#           key. Every party then works out the group key on its own from its co-path.
+#
+#                                                                      Writen by: Patrick Rainbolt
+#--------------------------------------------------------------------------------------------------
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import time
+import DHgroups
+
+# Storage for the group and table, set up once in every pool process by poolSetup().
+Worker = {}
+
+
+# Pool initializer: loads the group and its fixed base table into the worker process.
+def poolSetup(groupName, window, exponentBits, seed):
+    prime, root = DHgroups.getGroup(groupName)
+    Worker["prime"] = prime
+    Worker["engine"] = DHgroups.loadTable(groupName, window)
+    Worker["bits"] = exponentBits
+    Worker["seed"] = seed
+
+# Private key for a party. Keys come from the run seed so every process can make any party's key.
+def privateKey(party):
+    return random.Random(str(Worker["seed"]) + ":" + str(party)).getrandbits(Worker["bits"]) | 1
+
+# Turns a group element into an exponent for the next tree level.
+def nodeExponent(value):
+    width = (Worker["prime"].bit_length() + 7) // 8
+    return int.from_bytes(hashlib.shake_256(value.to_bytes(width, "big")).digest((Worker["bits"] + 7) // 8), "big") | 1
+
+# Short digest of a pair key, used to check that both sides of every pair agree.
+def pairDigest(low, high, key):
+    return int.from_bytes(hashlib.sha256((str(low) + ":" + str(high) + ":" + str(key)).encode()).digest()[:8], "big")
+
+# Pool task: public keys for a list of parties.
+def publicKeys(parties):
+    return [Worker["engine"].pow(privateKey(party)) for party in parties]
+
+# Pool task: every pair key for a list of parties. Returns the XOR of the pair digests, each pair
+#    is seen once from each side so a full run XORs to zero when every pair agrees.
+def pairKeys(parties, allPublic):
+    prime = Worker["prime"]
+    check = 0
+    for party in parties:
+        key = privateKey(party)
+        for other in range(len(allPublic)):
+            if other == party: continue
+            check ^= pairDigest(min(party, other), max(party, other), pow(allPublic[other], key, prime))
+    return check
+
+# Pool task: inner tree nodes for one level. Each entry is (left exponent, right blinded key) and
+#    gives back the node exponent and its blinded key root ^ exponent.
+def treeNodes(nodes):
+    prime = Worker["prime"]
+    out = []
+    for leftExponent, rightBlind in nodes:
+        exponent = nodeExponent(pow(rightBlind, leftExponent, prime))
+        out.append((exponent, Worker["engine"].pow(exponent)))
+    return out
+
+# Pool task: the group key as each party works it out from its own key and its co-path.
+def treeGroupKeys(parties, levels):
+    prime = Worker["prime"]
+    keys = []
+    operations = 0
+    for party in parties:
+        exponent = privateKey(party)
+        position = party
+        for blinded in levels:
+            sibling = position ^ 1
+            if sibling < len(blinded):
+                exponent = nodeExponent(pow(blinded[sibling], exponent, prime))
+                operations += 1
+            position >>= 1
+        keys.append(exponent)
+    return keys, operations
+
+
+# Splits range(count) into about four chunks per process so the pool stays busy.
+def chunks(count, processes):
+    size = max(1, count // (processes * 4))
+    return [list(range(i, min(i + size, count))) for i in range(0, count, size)]
+
+# Runs one all pairs simulation.
+def simulatePairs(pool, parties, processes):
+    result = {}
+    start = time.perf_counter()
+    allPublic = [key for part in pool.map(publicKeys, chunks(parties, processes)) for key in part]
+    result["keygen_s"] = time.perf_counter() - start
+    result["keygen_ops"] = parties
+
+    start = time.perf_counter()
+    check = 0
+    for part in pool.starmap(pairKeys, [(chunk, allPublic) for chunk in chunks(parties, processes)]):
+        check ^= part
+    result["agree_s"] = time.perf_counter() - start
+    result["agree_ops"] = parties * (parties - 1)
+    result["agreed"] = check == 0
+    return result
+
+# Runs one tree (TGDH) simulation.
+def simulateTree(pool, parties, processes):
+    result = {}
+    start = time.perf_counter()
+    blinded = [key for part in pool.map(publicKeys, chunks(parties, processes)) for key in part]
+    result["keygen_s"] = time.perf_counter() - start
+    result["keygen_ops"] = parties
+
+    # Build the tree bottom up, one level at a time. An odd node at the end of a level moves up as is.
+    start = time.perf_counter()
+    exponents = [privateKey(party) for party in range(parties)]
+    levels = []
+    operations = 0
+    while len(blinded) > 1:
+        levels.append(blinded)
+        pairs = [(exponents[i], blinded[i + 1]) for i in range(0, len(blinded) - 1, 2)]
+        nodes = [node for part in pool.map(treeNodes, [pairs[i:i + 64] for i in range(0, len(pairs), 64)]) for node in part]
+        operations += 2 * len(nodes)
+        nextExponents = [node[0] for node in nodes]
+        nextBlinded = [node[1] for node in nodes]
+        if len(blinded) % 2 == 1:
+            nextExponents.append(exponents[-1])
+            nextBlinded.append(blinded[-1])
+        exponents = nextExponents
+        blinded = nextBlinded
+    result["tree_s"] = time.perf_counter() - start
+    result["tree_ops"] = operations
+    result["tree_depth"] = len(levels)
+
+    # Every party now works out the group key from its co-path and it must match the root.
+    start = time.perf_counter()
+    groupKeys = []
+    result["agree_ops"] = 0
+    for keys, count in pool.starmap(treeGroupKeys, [(chunk, levels) for chunk in chunks(parties, processes)]):
+        groupKeys += keys
+        result["agree_ops"] += count
+    result["agree_s"] = time.perf_counter() - start
+    result["agreed"] = len(set(groupKeys)) == 1 and (parties == 1 or groupKeys[0] == exponents[0])
+    return result
+
+
+# Prints the report table and the scaling against the previous party count.
+def report(mode, results):
+    print("\n" + mode + " key agreement")
+    print("  Parties    Keygen ops/s    Agree ops/s     Agree ops   Wall(s)   Scaling   Agreed")
+    print("  " + "-" * 84)
+    previous = None
+    for result in results:
+        wall = result["wall_s"]
+        scaling = "-" if previous is None else "%.2fx" % (wall / previous["wall_s"])
+        print(str(result["parties"]).rjust(9) +
+              ("%.1f" % (result["keygen_ops"] / result["keygen_s"])).rjust(16) +
+              ("%.1f" % (result["agree_ops"] / result["agree_s"])).rjust(15) +
+              str(result["agree_ops"]).rjust(14) + ("%.3f" % wall).rjust(10) + scaling.rjust(10) +
+              ("yes" if result["agreed"] else "NO").rjust(9))
+        previous = result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="N party Diffie-Hellman key agreement simulator.")
+    parser.add_argument('--mode', choices=["pairs", "tree", "both"], default="both", help='Key agreement to simulate (default: both)')
+    parser.add_argument('--parties', nargs='+', type=int, default=[8, 32, 128, 512], help='Party counts to run')
+    parser.add_argument('--group', choices=DHgroups.groupNames(), default="modp2048", help='Standard group to use (default: modp2048)')
+    parser.add_argument('--exponent-bits', type=int, default=256, help='Private key size in bits (default: 256)')
+    parser.add_argument('--window', type=int, default=4, help='Fixed base table window in bits (default: 4)')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Pool size (default: all cores)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for the private keys')
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    # Set up the parent the same way as the workers, this also builds the table once so the
+    #    workers only have to load it.
+    poolSetup(args.group, args.window, args.exponent_bits, args.seed)
+    print("Group " + args.group + ", " + str(args.exponent_bits) + "-bit private keys, " + str(args.processes) + " processes")
+
+    modes = ["pairs", "tree"] if args.mode == "both" else [args.mode]
+    output = {"group": args.group, "exponent_bits": args.exponent_bits, "processes": args.processes, "seed": args.seed}
+    pool = multiprocessing.Pool(args.processes, initializer=poolSetup, initargs=(args.group, args.window, args.exponent_bits, args.seed))
+    try:
+        for mode in modes:
+            results = []
+            for parties in args.parties:
+                start = time.perf_counter()
+                if mode == "pairs": result = simulatePairs(pool, parties, args.processes)
+                else: result = simulateTree(pool, parties, args.processes)
+                result["wall_s"] = time.perf_counter() - start
+                result["parties"] = parties
+                results.append(result)
+            report(mode, results)
+            output[mode] = results
+    finally:
+        pool.close()
+        pool.join()
+
+    if args.json:
+        f = open(args.json, "w")
+        json.dump(output, f, indent=2)
+        f.close()
+        print("\nResults written to " + args.json)
+
+
+if __name__ == "__main__":
+    main()
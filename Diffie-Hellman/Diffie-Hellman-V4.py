@@ -1,6 +1,8 @@
 #!/usr/bin/python3
+import argparse
 import textwrap
 import random
+import DHgroups
 
 def BitRandom(num):
     return(random.randrange(int("9" * (num - 2)), int("1" + ("0" * num))))
@@ -21,6 +23,32 @@ def fixedOutput(fpre , fvalue):
     print(wrapper.fill(str(fvalue)))
     print("\n")
 
+# Private keys come from the group size when using a standard group.
+def getPrivateKey():
+    if args.curve: return DHcurve.getPrivateKey()
+    if rootTable: return random.randrange(2, prime - 1)
+    return getPrime(numDigits)
+
+# Public keys use the stored root table when using a standard group.
+def getPublicKey(privateKey):
+    if args.curve: return DHcurve.getPublicKey(privateKey)
+    if rootTable: return rootTable.pow(privateKey)
+    return pow(root, privateKey, prime)
+
+# Shared keys use ECDH on the curve when one is chosen.
+def getSharedKey(publicKey, privateKey):
+    if args.curve: return DHcurve.getSharedKey(publicKey, privateKey)
+    return pow(publicKey, privateKey, prime)
+
+parser = argparse.ArgumentParser(description="Diffie-Hellman shared key demonstration.")
+keyType = parser.add_mutually_exclusive_group()
+keyType.add_argument('--group', choices=DHgroups.groupNames(), help='Use a standard RFC 3526 / RFC 7919 group instead of a new prime')
+keyType.add_argument('--curve', choices=["x25519"], help='Use X25519 elliptic curve keys (needs the cryptography package)')
+parser.add_argument('--seed', type=int, help='Seed the random generator so a run can be reproduced')
+args = parser.parse_args()
+if args.seed is not None: random.seed(args.seed)
+if args.curve: import DHcurve
+
 termColorYellow = '\033[93m'
 termColorEnd = '\033[0m'
 
@@ -31,10 +59,17 @@ print("-----------------------------------------------------------")
 print("- Setting up the primary Program Prime and Primitive Root -")
 print("-----------------------------------------------------------\n")
 
-prime = getPrime(numDigits)
+if args.curve:
+    prime, root = DHcurve.getCurve(args.curve)
+    rootTable = None
+elif args.group:
+    prime, root = DHgroups.getGroup(args.group)
+    rootTable = DHgroups.loadTable(args.group)
+else:
+    prime = getPrime(numDigits)
+    root = getPrime(numDigits)
+    rootTable = None
 fixedOutput("The Program Prime", prime)
-
-root = getPrime(numDigits)
 fixedOutput("The Primitive Root", root)
 
 
@@ -42,22 +77,22 @@ print("-----------------------------------------------------------")
 print("- Alice and Bob create their Private keys                 -")
 print("-----------------------------------------------------------\n")
 
-AlicePrivateKey = getPrime(numDigits)
+AlicePrivateKey = getPrivateKey()
 fixedOutput("Alice Private Key", AlicePrivateKey)
 
-BobPrivateKey = getPrime(numDigits)
+BobPrivateKey = getPrivateKey()
 fixedOutput("Bob Private Key", BobPrivateKey)
 
 print("-----------------------------------------------------------")
 print("- Alice and Bob create their Public keys                  -")
 print("-----------------------------------------------------------\n")
 
-AlicePublicKey = pow(root, AlicePrivateKey, prime)
+AlicePublicKey = getPublicKey(AlicePrivateKey)
 print("Alice calculates her public key: " + termColorYellow + 
 	" AlicePublicKey = root ^ AlicePrivateKey mod Prime " + termColorEnd + ":")
 fixedOutput("AlicePublicKey", AlicePublicKey)
 
-BobPublicKey = pow(root, BobPrivateKey, prime)
+BobPublicKey = getPublicKey(BobPrivateKey)
 print("Bob calculates his public key:  " + termColorYellow + 
 	" BobPublicKey = root ^ BobPrivateKey mod prime " + termColorEnd + ":")
 fixedOutput("BobPublicKey", BobPublicKey)
@@ -66,12 +101,12 @@ print("-----------------------------------------------------------")
 print("- How to calculate the Password from their Private Keys   -")
 print("-----------------------------------------------------------\n")
 
-AliceKey = pow(BobPublicKey, AlicePrivateKey, prime)
+AliceKey = getSharedKey(BobPublicKey, AlicePrivateKey)
 print("Alice calculates the shared key as " + termColorYellow + 
 	"Key = BobPublicKey ^ AlicePrivateKey mod prime " + termColorEnd + ":")
 fixedOutput("AliceKey", AliceKey)
 
-BobKey = pow(AlicePublicKey, BobPrivateKey, prime)
+BobKey = getSharedKey(AlicePublicKey, BobPrivateKey)
 print("Bob calculates the shared key as " + termColorYellow + 
 	"Key = ALicePublicKey ^ BobPrivateKey mod prime " + termColorEnd + ":")
 fixedOutput("BobKey", BobKey)
@@ -0,0 +1,214 @@
+#!/usr/bin/python3
+#--------------------------------------------------------------------------------------------------
+# MScrack is an analysis tool that attacks MScipher (V2 / V3) cipher text. It is here to audit how
+#    quickly MScipher messages fall, not to replace the cipher.
+#
+#    How it works: Encrypt adds a Rotator to the Shift for every character, so the Shift used on
+#    character t of a password of length m is
+#
+#        Shift(t) = Shift + R[0] + R[1] + ... + R[t mod m] + (t div m) * T       (mod List length)
+#
+#    where T is the sum of all the Rotators. Every period column (t mod m) therefore has its own
+#    offset, and moving down a column adds T each row. For each word list, Justify mode, Leap mode
+#    and period, MScrack tries every T and every column offset at once with NumPy, scores each
+#    column with a chi-square against English letter frequencies, and keeps the best offset per
+#    column. The initial Shift does not need its own loop: once T and the column offsets are known
+#    the Shift is the last offset minus T, and the Rotators (and so the password) fall out of the
+#    differences between offsets. Every Shift value is therefore covered by every search.
+#
+#                                                                      Writen by: Patrick Rainbolt
+#--------------------------------------------------------------------------------------------------
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+from MSengine import Ceasar, Decrypt
+
+# THIRD-PARTY IMPORTS (requires: pip install numpy)
+import numpy as np
+
+# The built in MScipher word lists.
+WORDLISTS = {
+    "minimal":  "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789",
+    "standard": "ABCDEFGHIJKLMNOPQRSTUVWXYZ 0123456789",
+    "enlarged": "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789abcdefghijklmnopqrstuvwxyz",
+    "expanded": "AaBbCcDdEeFfGgHhIiJjKkLlMmNnOoPpQqRrSsTtUuVvWwXxYyZz 0123456789",
+}
+
+JUSTIFY = ["Left", "Mid", "Right"]
+
+# English letter frequencies in percent.
+ENGLISH = {"E": 12.70, "T": 9.06, "A": 8.17, "O": 7.51, "I": 6.97, "N": 6.75, "S": 6.33, "H": 6.09,
+           "R": 5.99, "D": 4.25, "L": 4.03, "C": 2.78, "U": 2.76, "M": 2.41, "W": 2.36, "F": 2.23,
+           "G": 2.02, "Y": 1.97, "P": 1.93, "B": 1.29, "V": 0.98, "K": 0.77, "J": 0.15, "X": 0.15,
+           "Q": 0.10, "Z": 0.07}
+
+
+# Character weights for plain English text: letters 80%, space 18%, digits 2%.
+def englishWeights():
+    weights = {" ": 0.18}
+    for letter, percent in ENGLISH.items():
+        weights[letter] = 0.80 * percent / 100
+    for digit in "0123456789":
+        weights[digit] = 0.002
+    return weights
+
+# Character weights counted from a sample text file instead of the built in English table.
+def sampleWeights(fileName):
+    f = open(fileName, "r", encoding="utf-8")
+    text = f.read()
+    f.close()
+    weights = {}
+    for char in text:
+        weights[char] = weights.get(char, 0) + 1
+    return {char: count / len(text) for char, count in weights.items()}
+
+# Expected frequency of every character in a word list. When the list has both cases the
+#    letter weight is split 95% lower case / 5% upper case. Nothing is allowed to be zero.
+def listFrequencies(wordList, weights):
+    chars = set(wordList)
+    freq = []
+    for char in wordList:
+        weight = weights.get(char, 0.0)
+        if char.isalpha() and char.upper() != char.lower():
+            folded = weights.get(char.upper(), 0.0) + weights.get(char.lower(), 0.0)
+            if char.upper() in chars and char.lower() in chars: weight = folded * (0.95 if char.islower() else 0.05)
+            else: weight = folded
+        freq.append(max(weight, 1e-4))
+    freq = np.array(freq)
+    return freq / freq.sum()
+
+# Case folded log likelihood of a text, used to rank results across word lists.
+def textScore(text, weights):
+    folded = {}
+    for char, weight in weights.items():
+        folded[char.upper()] = folded.get(char.upper(), 0.0) + weight
+    return sum(math.log(folded.get(char.upper(), 0.0) + 1e-4) for char in text)
+
+
+# Effective left rotation used by Ceasar() for each Shift value 0 .. L-1 and a Justify mode.
+def rotationTable(length, justify):
+    shifts = np.arange(length)
+    if justify == "Left": return shifts
+    if justify == "Right": return (-shifts) % length
+    return np.where(shifts < length // 2, shifts, (-shifts) % length)
+
+
+# Stream positions and list indexes for every cipher text character that is in the word list.
+def streamPositions(text, wordList, leap):
+    index = {char: pos for pos, char in reversed(list(enumerate(wordList)))}
+    positions = []
+    values = []
+    for i, char in enumerate(text):
+        if char in index:
+            positions.append(len(positions) if leap else i)
+            values.append(index[char])
+    return np.array(positions, dtype=np.int64), np.array(values, dtype=np.int64)
+
+# Chi-square of every (T, column offset) pair for one period column.
+#    Returns an array [T, offset] of scores.
+def columnScores(values, rows, length, rotation, expected):
+    offsets = np.arange(length)
+    scores = np.empty((length, length))
+    flat = offsets[:, None] * length
+    for total in range(length):
+        shifts = (offsets[:, None] + rows[None, :] * total) % length
+        plain = (values[None, :] - rotation[shifts]) % length
+        counts = np.bincount((flat + plain).ravel(), minlength=length * length).reshape(length, length)
+        scores[total] = (((counts - expected) ** 2) / expected).sum(axis=1)
+    return scores
+
+# Pool task: best key for one (word list, justify, leap, period) candidate.
+def crackCandidate(task):
+    listName, wordList, justify, leap, period, text, weights = task
+    length = len(wordList)
+    positions, values = streamPositions(text, wordList, leap)
+    if len(values) < period: return None
+    rotation = rotationTable(length, justify)
+    freq = listFrequencies(wordList, weights)
+
+    columns = []
+    totalScores = np.zeros(length)
+    for column in range(period):
+        mask = positions % period == column
+        if not mask.any():
+            columns.append(np.zeros((length, length)))
+            continue
+        scores = columnScores(values[mask], positions[mask] // period, length, rotation, freq * mask.sum())
+        columns.append(scores)
+        totalScores += scores.min(axis=1)
+
+    total = int(totalScores.argmin())
+    offsets = [int(scores[total].argmin()) for scores in columns]
+
+    # Shift = last offset - T, Rotators are the steps between offsets.
+    shift = (offsets[-1] - total) % length
+    rotate = [(offsets[0] - shift) % length] + [(offsets[i] - offsets[i - 1]) % length for i in range(1, period)]
+    cipher = Ceasar(shift, justify, wordList, False)
+    plain = Decrypt(shift, justify, rotate, wordList, text, False, leap, False)
+    score = textScore(plain, weights)
+    return {"wordlist": listName, "justify": justify, "leap": leap, "period": period, "shift": shift,
+            "rotators": rotate, "password": "".join(cipher[r] for r in rotate),
+            "chi2": float(totalScores[total]), "score": score,
+            "adjusted": score - (period + 1) * math.log(length), "plaintext": plain}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MScipher cipher text key recovery (analysis tool).")
+    parser.add_argument('text', nargs='?', help='Cipher text (or use -infile / STDIN)')
+    parser.add_argument('-infile', help='Read the cipher text from a file')
+    parser.add_argument('-max-period', type=int, default=12, help='Longest password / Rotator period to try (default: 12)')
+    parser.add_argument('-wordlists', nargs='+', choices=list(WORDLISTS), default=list(WORDLISTS), help='Word lists to try (default: all)')
+    parser.add_argument('-justify', nargs='+', choices=JUSTIFY, default=JUSTIFY, help='Justify modes to try (default: all)')
+    parser.add_argument('-leap', choices=["no", "yes", "both"], default="both", help='Leap modes to try (default: both)')
+    parser.add_argument('-sample', help='Text file to take character frequencies from instead of English')
+    parser.add_argument('-jobs', type=int, default=os.cpu_count(), help='Processes to use (default: all cores)')
+    parser.add_argument('-top', type=int, default=5, help='Results to show (default: 5)')
+    parser.add_argument('-json', help='Write every result to this JSON file')
+    args = parser.parse_args()
+
+    if args.infile:
+        f = open(args.infile, "r", encoding="utf-8")
+        text = f.read().rstrip("\n")
+        f.close()
+    elif args.text: text = args.text
+    elif not sys.stdin.isatty(): text = sys.stdin.read().rstrip("\n")
+    else: parser.error("No cipher text given")
+
+    weights = sampleWeights(args.sample) if args.sample else englishWeights()
+    leaps = {"no": [False], "yes": [True], "both": [False, True]}[args.leap]
+    tasks = [(name, WORDLISTS[name], justify, leap, period, text, weights)
+             for name in args.wordlists for justify in args.justify for leap in leaps
+             for period in range(1, args.max_period + 1)]
+
+    start = time.perf_counter()
+    pool = multiprocessing.Pool(args.jobs)
+    try:
+        results = [result for result in pool.imap_unordered(crackCandidate, tasks, chunksize=1) if result]
+    finally:
+        pool.close()
+        pool.join()
+    elapsed = time.perf_counter() - start
+
+    # Longer periods always fit a little better, so rank on the score less the cost of the extra key.
+    results.sort(key=lambda result: result["adjusted"], reverse=True)
+    print("MScrack: " + str(len(tasks)) + " candidates in " + ("%.2f" % elapsed) + "s (" +
+          ("%.1f" % (len(tasks) / elapsed)) + " candidates/s, " + str(args.jobs) + " processes)\n")
+    for rank, result in enumerate(results[:args.top], 1):
+        print("#" + str(rank) + "  List[" + result["wordlist"] + "] Justify[" + result["justify"] + "] Leap[" +
+              str(result["leap"]) + "] Period[" + str(result["period"]) + "] Shift[" + str(result["shift"]) +
+              "] Score[" + ("%.1f" % result["adjusted"]) + "]")
+        print("    Rotators" + str(result["rotators"]) + "  Password[" + result["password"] + "]")
+        print("    " + result["plaintext"][:100] + "\n")
+
+    if args.json:
+        f = open(args.json, "w")
+        json.dump({"seconds": elapsed, "candidates": len(tasks), "results": results}, f, indent=2)
+        f.close()
+
+
+if __name__ == "__main__":
+    main()
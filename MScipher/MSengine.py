@@ -0,0 +1,280 @@
+#!/usr/bin/python3
+#--------------------------------------------------------------------------------------------------
+# MSengine is the one MScipher engine shared by MSencode/MSdecode (V1), MScipher-V2 and MScipher-V3.
+#    The version= switch reproduces each version's output exactly:
+#
+#    version=1  Every character is uppercased before the lookup, Justify is always Left, there is
+#               no Leap, and a character that is not in the list comes out as the last character
+#               of the shifted list (V1 behaviour).
+#    version=2  Justify, Leap and Convert (-u) are used, characters not in the list are kept as is.
+#    version=3  Same cipher as version 2 (V3 only adds the Key Pairs).
+#
+#    Instead of building a new shifted list with Ceasar() for every character, the word list is
+#    compiled once into a character to position dictionary and each shifted list is worked out
+#    with index arithmetic, so a character costs the same whatever the size of the list.
+#
+#    Word lists do not have to be one of the four built in lists. LoadWordList() reads any alphabet
+#    from a file, written as characters and Unicode ranges (U+4E00-U+9FFF), up to the whole of
+#    Unicode.
+#
+#                                                                      Writen by: Patrick Rainbolt
+#--------------------------------------------------------------------------------------------------
+import argparse
+import array
+import functools
+import random
+import re
+import sys
+import time
+
+
+# Compiles a word list into { character: first position } and { character: every position }.
+@functools.lru_cache(maxsize=32)
+def CompileList(inWordList):
+     index = {}
+     places = {}
+     for pos, char in enumerate(inWordList):
+         index.setdefault(char, pos)
+         places.setdefault(char, []).append(pos)
+     return index, {char: tuple(pos) for char, pos in places.items()}
+
+# Left rotation for every Shift 0 .. length, the only Shift values the cipher loop can reach
+#    above zero. Kept per list length and Justify so a long list only pays for it once.
+@functools.lru_cache(maxsize=32)
+def RotationTable(inLength, inDir):
+     return array.array('l', [Rotation(shift, inDir, inLength)[0] for shift in range(inLength + 1)])
+
+# Reads a word list from a file. Each line is either a Unicode range written as U+XXXX-U+YYYY, a
+#    single U+XXXX, or plain characters to add as they are. Blank lines and lines starting with
+#    "#" are skipped, and a character already in the list is not added twice so every character
+#    has one position. Surrogate code points (U+D800-U+DFFF) can not be written out and are left out.
+def LoadWordList(inFile):
+     wordList = []
+     seen = set()
+     f = open(inFile, "r", encoding="utf-8")
+     for line in f:
+         line = line.rstrip("\r\n")
+         if line.strip() == "" or line.startswith("#"): continue
+         if re.fullmatch(r'\s*U\+[0-9A-Fa-f]{1,6}(\s*-\s*U\+[0-9A-Fa-f]{1,6})?\s*', line):
+             ends = [int(code, 16) for code in re.findall(r'U\+([0-9A-Fa-f]+)', line)]
+             chars = (chr(code) for code in range(ends[0], ends[-1] + 1) if not 0xD800 <= code <= 0xDFFF)
+         else: chars = line
+         for char in chars:
+             if char not in seen:
+                 seen.add(char)
+                 wordList.append(char)
+     f.close()
+     if len(wordList) < 2:
+         print("\nMScipher: Word List file " + inFile + " needs at least 2 characters!\n")
+         sys.exit(1)
+     return "".join(wordList)
+
+# How far Ceasar() turns the list to the left for a Shift value, and the resolved direction.
+#    Matches the list slicing in Ceasar(), where a Shift past either end leaves the list as is.
+def Rotation(inShift, inDir, inLength):
+     if inDir == 'Mid':
+         if inShift < int(inLength / 2): inDir = 'Left'
+         else: inDir = 'Right'
+     if inDir == 'Right': inShift *= -1
+     if -inLength <= inShift <= inLength: return inShift % inLength, inDir
+     return 0, inDir
+
+# Checking if Shift is larger than the WordLst length. If so it does a Modular to
+#   length to get Shift Value.
+def CreateShift(inShift, inList, inDebug):
+     if inShift >= len(inList):
+         if inDebug: print("- LEN[->] pSHF["+str(inShift)+"] MOD["+str(inShift) + "-INT("+str(inShift) + "/" +
+             str(len(inList)) + ")] SHF[" + str(inShift % len(inList)) + "]")
+         inShift = inShift % len(inList)
+     else:
+         if inDebug: print("- LEN[..] SHF["+str(inShift)+"]\n")
+     return inShift
+
+# Creating Shifted Set (Values are: Left, Mid, Right)
+def Ceasar(inShift, inDir , inLst, inDebug):
+     rot, inDir = Rotation(inShift, inDir, len(inLst))
+     if inDebug: print("- " + inDir[0], end ="")
+     return inLst[rot:] + inLst[:rot]
+
+# Getting Rotate Values from Password using Intial Shifted List.
+def CreateRotators(inCipher, inPass, inConvert, inDebug, version=3):
+     index = CompileList(inCipher)[0]
+     if version == 1: return [index.get(char.upper(), -1) for char in inPass]
+     tmpRotate = []
+     if inDebug: print("\n- LEN[" + str(len(inCipher)).rjust(2, ' ') + "] LST["+ inCipher +"]")
+
+     if inConvert: inPass = inPass.upper()
+     for char in inPass:
+         tmpRotate.append(index.get(char, -1))
+         if inDebug: print("# CHAR[" + str(char) +"] POS[" + str(tmpRotate[-1]).rjust(2, ' ') + "]")
+     if inDebug: print("- LEN[" + str(len(tmpRotate)).rjust(2, ' ') + "] ROT" + str(tmpRotate)+"\n")
+     return tmpRotate
+
+# Encript Text string with rotate keys.
+def Encrypt(inShift, inJustify, inRotate, inWordList, inText, inConvert, inLeap, inDebug, version=3):
+     return Cipher(False, inShift, inJustify, inRotate, inWordList, inText, inConvert, inLeap, inDebug, version)
+
+# Decript Cripted string with rotate keys.
+def Decrypt(inShift, inJustify, inRotate, inWordList, inText, inConvert, inLeap, inDebug, version=3):
+     return Cipher(True, inShift, inJustify, inRotate, inWordList, inText, inConvert, inLeap, inDebug, version)
+
+# The cipher loop shared by Encrypt and Decrypt for every version.
+def Cipher(inDecrypt, inShift, inJustify, inRotate, inWordList, inText, inConvert, inLeap, inDebug, version):
+     if version == 1: inJustify, inConvert, inLeap = "Left", True, False
+     elif inConvert: inWordList = inWordList.upper()
+     LenWordList = len(inWordList)
+     index, places = CompileList(inWordList)
+     # A Shift below zero (a Rotator of -1 for a password character not in the list) is worked out as it comes.
+     rotations = RotationTable(LenWordList, inJustify)
+     outText = []
+     lpRotate = 0
+
+     for inChar in inText:
+         lookChar = inChar.upper() if inConvert else inChar
+         if inLeap and lookChar not in index:
+             outText.append(inChar)
+             if inDebug: print("- S[" + inChar + "] pSHF[--] ROT[--] " + ("-"*LenWordList) + " SFT[--] POS[--] = [" + inChar + "]")
+             continue
+
+         # Gets Shift + Rotate Vaule, if larger than List it subtracts List Length from Shift.
+         preShift = inShift
+         inShift = inShift + inRotate[lpRotate]
+         if inShift > LenWordList: inShift -= LenWordList
+         if inShift >= 0: rot = rotations[inShift]
+         else: rot = Rotation(inShift, inJustify, LenWordList)[0]
+
+         if inDecrypt:
+             # Position of the character in the shifted list, the first one if it is there twice.
+             PosChar = index.get(lookChar, -1)
+             if PosChar != -1:
+                 if len(places[lookChar]) == 1: PosChar = (PosChar - rot) % LenWordList
+                 else: PosChar = min((pos - rot) % LenWordList for pos in places[lookChar])
+             if PosChar != -1: outChar = inWordList[PosChar]
+             elif version == 1: outChar = inWordList[-1]
+             else: outChar = inChar
+         else:
+             PosChar = index.get(lookChar, -1)
+             if PosChar != -1 or version == 1: outChar = inWordList[(PosChar + rot) % LenWordList]
+             else: outChar = inChar
+         outText.append(outChar)
+
+         if inDebug:
+             ShiftLst = inWordList[rot:] + inWordList[:rot]
+             direction = Rotation(inShift, inJustify, LenWordList)[1]
+             if version == 1: print("[" + inChar + "] " + ShiftLst + " SFT["+ str(inShift).rjust(2, ' ') + "] POS["+ str(PosChar).rjust(2, ' ') + "] = [" + outChar + "]")
+             else: print("- " + direction[0] + "[" + inChar + "] pSHF["+str(preShift).rjust(2, ' ')+"] ROT["+str(inRotate[lpRotate]).rjust(2, ' ')+"] " +
+                 ShiftLst + " SFT["+ str(inShift).rjust(2, ' ') + "] POS["+ str(PosChar).rjust(2, ' ') + "] = [" + outChar + "]")
+
+         # Checks to see that we have not used all the Rotate Values, if so it starts over.
+         if lpRotate == len(inRotate) - 1:
+             lpRotate = 0
+         else:
+             lpRotate += 1
+
+     outText = "".join(outText)
+     if inDebug and version != 1:
+         print(" ")
+         print("- " + ("Encrypted: " if inDecrypt else "PlainText: ") + inText)
+         print("- " + ("PlainText: " if inDecrypt else "Encrypted: ") + outText)
+         print(" ")
+     return outText
+
+
+# The old per character loop (a new Ceasar() list for every character), kept for the benchmark.
+def LegacyCipher(inDecrypt, inShift, inJustify, inRotate, inWordList, inText, inConvert, inLeap, version):
+     if version == 1: inJustify, inConvert, inLeap = "Left", True, False
+     elif inConvert: inWordList = inWordList.upper()
+     outText = ""
+     lpRotate = 0
+     for inChar in inText:
+         lookChar = inChar.upper() if inConvert else inChar
+         if inLeap and inWordList.find(lookChar) == -1:
+             outText += inChar
+             continue
+         inShift = inShift + inRotate[lpRotate]
+         if inShift > len(inWordList): inShift -= len(inWordList)
+         ShiftLst = Ceasar(inShift, inJustify, inWordList, False)
+         if inDecrypt:
+             PosChar = ShiftLst.find(lookChar)
+             outText += inWordList[PosChar] if PosChar != -1 or version == 1 else inChar
+         else:
+             PosChar = inWordList.find(lookChar)
+             outText += ShiftLst[PosChar] if PosChar != -1 or version == 1 else inChar
+         lpRotate = 0 if lpRotate == len(inRotate) - 1 else lpRotate + 1
+     return outText
+
+# Cross version benchmark: the engine against the old loop for every version and text size.
+def benchmark(sizes, wordList, repeat):
+     print("Version  Chars      Old loop ms   Engine ms   Speedup   Same")
+     print("-" * 62)
+     letters = wordList + wordList.lower() + " .,"
+     for version in (1, 2, 3):
+         for size in sizes:
+             text = "".join(random.choice(letters) for i in range(size))
+             shift = CreateShift(5, wordList, False)
+             rotate = CreateRotators(Ceasar(shift, "Mid", wordList, False), "PASSWORD", True, False, version)
+             justify = "Left" if version == 1 else "Mid"
+
+             start = time.perf_counter()
+             for i in range(repeat): old = LegacyCipher(False, shift, justify, rotate, wordList, text, True, False, version)
+             oldTime = (time.perf_counter() - start) / repeat
+             start = time.perf_counter()
+             for i in range(repeat): new = Encrypt(shift, justify, rotate, wordList, text, True, False, False, version)
+             newTime = (time.perf_counter() - start) / repeat
+             back = Decrypt(shift, justify, rotate, wordList, new, True, False, False, version)
+             same = new == old and back == LegacyCipher(True, shift, justify, rotate, wordList, new, True, False, version)
+
+             print(str(version).rjust(7) + str(size).rjust(7) + ("%.2f" % (oldTime * 1000)).rjust(16) +
+                   ("%.2f" % (newTime * 1000)).rjust(12) + ("%.1fx" % (oldTime / newTime)).rjust(10) +
+                   ("yes" if same else "NO").rjust(7))
+
+# Word list of the first size printable code points from U+0021 on, without the surrogates.
+def UnicodeList(size):
+     chars = []
+     code = 0x21
+     while len(chars) < size:
+         if not 0xD800 <= code <= 0xDFFF and chr(code).isprintable(): chars.append(chr(code))
+         code += 1
+     return "".join(chars)
+
+# Alphabet size benchmark: time per character for word lists from 36 up to 65k symbols.
+def alphabetBenchmark(sizes, textSize, repeat):
+     print("Symbols    Old loop ns/char   Encrypt ns/char   Decrypt ns/char   Compile ms   Same")
+     print("-" * 83)
+     for size in sizes:
+         wordList = UnicodeList(size)
+         text = "".join(random.choice(wordList) for i in range(textSize))
+         rotate = CreateRotators(Ceasar(5, "Mid", wordList, False), "".join(random.choice(wordList) for i in range(8)), False, False)
+
+         start = time.perf_counter()
+         old = LegacyCipher(False, 5, "Mid", rotate, wordList, text, False, False, 3)
+         oldTime = time.perf_counter() - start
+         # The list is compiled once, the per character cost is timed after that.
+         start = time.perf_counter()
+         CompileList(wordList)
+         RotationTable(len(wordList), "Mid")
+         compileTime = time.perf_counter() - start
+         times = []
+         for cipher in (Encrypt, Decrypt):
+             start = time.perf_counter()
+             for i in range(repeat): out = cipher(5, "Mid", rotate, wordList, text if cipher is Encrypt else new, False, False, False)
+             times.append((time.perf_counter() - start) / repeat)
+             if cipher is Encrypt: new = out
+         same = new == old and out == text
+
+         print(str(size).rjust(7) + ("%.0f" % (oldTime / textSize * 1e9)).rjust(20) + ("%.0f" % (times[0] / textSize * 1e9)).rjust(18) +
+               ("%.0f" % (times[1] / textSize * 1e9)).rjust(18) + ("%.2f" % (compileTime * 1000)).rjust(13) + ("yes" if same else "NO").rjust(7))
+
+
+if __name__ == "__main__":
+     parser = argparse.ArgumentParser(description="MScipher engine cross version and alphabet size benchmark.")
+     parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000], help='Text sizes in characters')
+     parser.add_argument('--wordlist', default="ABCDEFGHIJKLMNOPQRSTUVWXYZ 0123456789", help='Word list to use')
+     parser.add_argument('--repeat', type=int, default=3, help='Runs per timing')
+     parser.add_argument('--seed', type=int, default=1, help='Seed for the random text')
+     parser.add_argument('--alphabets', nargs='+', type=int, help='Run the alphabet size benchmark for these list sizes instead (e.g. 36 256 4096 65000)')
+     parser.add_argument('--text', type=int, default=20000, help='Text size in characters for --alphabets')
+     args = parser.parse_args()
+     random.seed(args.seed)
+     if args.alphabets: alphabetBenchmark(args.alphabets, args.text, args.repeat)
+     else: benchmark(args.sizes, args.wordlist, args.repeat)
@@ -7,6 +7,11 @@
 #--------------------------------------------------------------------------------------------------
 import sys
 import re
+import os
+
+# The cipher itself lives in the shared MScipher engine one folder up.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from MSengine import CreateShift, Ceasar, CreateRotators, Encrypt, Decrypt, LoadWordList
 
 # Setting this to True will show all Debug messages
 Debug = False
@@ -66,6 +71,8 @@ def SyntaxInformation():
      {--standard}   Sets Key to {ABCDEFGHIJKLMNOPQRSTUVWXYZ 0123456789}
      {--enlarged}   Sets Key to {ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789abcdefghijklmnopqrstuvwxyz}
      {--expanded}   Sets Key to {AaBbCcDdEeFfGgHhIiJjKkLlMmNnOoPpQqRrSsTtUuVvWwXxYyZz 0123456789}
+     {--wordfile}   Followed by a file name, Sets Key to the characters in the file. Lines can be
+                              plain characters or Unicode ranges like U+0400-U+04FF.
 
      {--debug}      Turns on verbose mode.
      """)
@@ -125,6 +132,11 @@ def CmdLineParser():
              WordList = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789abcdefghijklmnopqrstuvwxyz"
          elif ARG[1] == "--expanded":                                      # Sets Expanded Key List
              WordList = "AaBbCcDdEeFfGgHhIiJjKkLlMmNnOoPpQqRrSsTtUuVvWwXxYyZz 0123456789"
+         elif ARG[1] == "--wordfile":                                      # Sets Key List from a file
+             if len(ARG) > 2:
+                 WordList = LoadWordList(ARG[2])
+                 DebugOut += " + ["+str(ARG[2])+"]"
+                 del ARG[2]
          elif  ARG[1] == "-s" or ARG[1].lower() == "--shift":              # Set Shift Value
              if len(ARG) > 1:                                              # Confirming Next Value is Int and storing.
                  tmpShift = re.compile(r'[^\d.]+')
@@ -153,128 +165,6 @@ def CmdLineParser():
          print("- LEN[" + str(len(Password)).rjust(2, ' ') + "] PAS["+ Password +"]")
      return inData
 
-# Checking if Shift is larger than the WordLst length. If so it does a Modular to
-#   length to get Shift Value.
-def CreateShift(inShift, inList, inDebug):
-     if inShift >= len(inList):
-         if inDebug: print("- LEN[->] pSHF["+str(inShift)+"] MOD["+str(inShift) + "-INT("+str(inShift) + "/" + 
-             str(len(inList)) + ")] SHF[" + str(inShift % len(inList)) + "]")
-         inShift = inShift % len(inList)
-     else:
-         if inDebug: print("- LEN[..] SHF["+str(inShift)+"]\n")
-     return inShift
-
-# Creating Shifted Set (Values are: Left, Mid, Right)
-def Ceasar(inShift, inDir , inLst, inDebug):
-     if inDir == 'Mid':
-         if inShift < int(len(WordList) / 2): inDir = 'Left'
-         else: inDir = 'Right'
-     if inDir == 'Right': inShift *= -1
-     if inDebug: print("- " + inDir[0], end ="")
-     return inLst[inShift:] + inLst[:inShift]
-
-# Getting Rotate Values from Password using Intial Shifted List.
-def CreateRotators(inCipher, inPass, inConvert, inDebug):
-     tmpRotate = []
-     if inDebug: print("\n- LEN[" + str(len(inCipher)).rjust(2, ' ') + "] LST["+ inCipher +"]")
-
-     if inConvert: inPass = inPass.upper()
-     for char in inPass:
-         if Convert: tmpRotate.append(inCipher.find(char.upper()))
-         else: tmpRotate.append(inCipher.find(char))
-
-         if inDebug: print("# CHAR[" + str(char) +"] POS[" + str(tmpRotate[-1]).rjust(2, ' ') + "]")
-     if inDebug: print("- LEN[" + str(len(tmpRotate)).rjust(2, ' ') + "] ROT" + str(tmpRotate)+"\n")
-     return tmpRotate
-
-
-# Encript Text string with rotate keys.
-def Encrypt(inShift, inJustify, inRotate, inWordList, inText, inConvert, inLeap, inDebug):
-     CipherText = ""
-     lpRotate = 0
-     LenWordList = len(inWordList)
-
-     if inConvert: inWordList = inWordList.upper()
-     for inChar in inText:
-         if (inLeap and inConvert and inWordList.find(inChar.upper()) == -1) or (inLeap and inConvert == False and inWordList.find(inChar) == -1):
-             EncodedChar = inChar
-             if inDebug: print("- S[" + inChar + "] pSHF[--] ROT[--] " + ("-"*len(ShiftLst)) + " SFT[--] POS[--] = [" + EncodedChar + "]")
-         else:
-             # Gets Shift + Rotate Vaule, if larger than List it subtracts List Length from Shift.
-             preShift = inShift
-             inShift = inShift + inRotate[lpRotate]
-             if inShift > LenWordList: inShift -= LenWordList
-             # Converts all letters to uppercase and finds character position
-             if inConvert: PosChar = inWordList.find(inChar.upper())
-             else: PosChar = inWordList.find(inChar)
-
-             # Creates new list for new Shift position
-             ShiftLst = Ceasar(inShift, inJustify, inWordList, inDebug)
-             # Grabs character from new list using found position.
-             if PosChar != -1: EncodedChar = ShiftLst[PosChar]
-             else: EncodedChar = inChar
-             if inDebug: print("[" + inChar + "] pSHF["+str(preShift).rjust(2, ' ')+"] ROT["+str(inRotate[lpRotate]).rjust(2, ' ')+"] " + 
-                 ShiftLst + " SFT["+ str(inShift).rjust(2, ' ') + "] POS["+ str(PosChar).rjust(2, ' ') + "] = [" + EncodedChar + "]")
-             # Checks to see that we have not used all the Rotate Values, if so it starts over.
-             if lpRotate == len(inRotate) - 1:
-                 lpRotate = 0
-             else:
-                 lpRotate += 1
-         # Appends new character to Ciphered Text
-         CipherText += EncodedChar
-
-     if inDebug:
-         print(" ")
-         print("- PlainText: " + inText)
-         print("- Encrypted: " + CipherText)
-         print(" ")
-     return CipherText
-
-# Decript Cripted string with rotate keys.
-def Decrypt(inShift, inJustify, inRotate, inWordList, inText, inConvert, inLeap, inDebug):
-     PlainText = ""
-     lpRotate = 0
-     LenWordList = len(inWordList)
-
-     if inConvert: inWordList = inWordList.upper()
-     for inChar in inText:
-         if (inLeap and inConvert and inWordList.find(inChar.upper()) == -1) or (inLeap and inConvert == False and inWordList.find(inChar) == -1):
-             DecodedChar = inChar
-             if inDebug: print("- S[" + inChar + "] pSHF[--] ROT[--] " + ("-"*len(ShiftLst)) + " SFT[--] POS[--] = [" + DecodedChar + "]")
-         else:
-             preShift = inShift
-             # Gets Shift + Rotate Vaule, if larger than List it subtracts List Length from Shift.
-             inShift = inShift + inRotate[lpRotate]
-             if inShift > LenWordList: inShift -= LenWordList
-
-             # Creates new list for new Shift position
-             ShiftLst = Ceasar(inShift, inJustify ,inWordList, inDebug)
-             # Converts all letters to uppercase and finds character position
-             if inConvert: PosChar = ShiftLst.find(inChar.upper())
-             else: PosChar = ShiftLst.find(inChar)
-
-             # Grabs character from new list using found position.
-             if PosChar != -1: DecodedChar = inWordList[PosChar]
-             else: DecodedChar = inChar
-             if inDebug: print("[" + inChar + "] pSHF["+str(preShift).rjust(2, ' ')+"] ROT["+str(inRotate[lpRotate]).rjust(2, ' ')+"] " + 
-                 ShiftLst + " SFT["+ str(inShift).rjust(2, ' ') + "] POS["+ str(PosChar).rjust(2, ' ') + "] = [" + DecodedChar + "]")
-
-             # Checks to see that we have not used all the Rotate Values, if so it starts over.
-             if lpRotate == len(inRotate) - 1:
-                 lpRotate = 0
-             else:
-                 lpRotate += 1
-         # Appends new character to Ciphered Text
-         PlainText += DecodedChar
-
-
-     if inDebug:
-         print(" ")
-         print("- Encrypted: " + inText)
-         print("- PlainText: " + PlainText)
-         print(" ")
-     return PlainText
-
 
 # Main Routines
 CmdText = CmdLineParser()
@@ -11,6 +11,10 @@ import re
 import random
 import os
 
+# The cipher itself lives in the shared MScipher engine one folder up.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from MSengine import CreateShift, Ceasar, CreateRotators, Encrypt, Decrypt, LoadWordList
+
 # Setting this to True will show all Debug messages
 Debug = False
 
@@ -65,6 +69,9 @@ KeyPair = False
 # Diffie-Hellman username in the Public Key Ring
 KeyPairName = ""
 
+# Key Pair backend used by --keygen: "" for the modular Prime/Root keys or "x25519" for elliptic curve keys.
+KeyCurve = ""
+
 
 # Syntax Information
 def SyntaxInformation():
@@ -85,10 +92,14 @@ def SyntaxInformation():
      {--standard}   Sets Key to {ABCDEFGHIJKLMNOPQRSTUVWXYZ 0123456789}
      {--enlarged}   Sets Key to {ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789abcdefghijklmnopqrstuvwxyz}
      {--expanded}   Sets Key to {AaBbCcDdEeFfGgHhIiJjKkLlMmNnOoPpQqRrSsTtUuVvWwXxYyZz 0123456789}
+     {--wordfile}   Followed by a file name, Sets Key to the characters in the file. Lines can be
+                              plain characters or Unicode ranges like U+0400-U+04FF.
 
      {--keyroot}    Generates a new set of Rotator Keys Prime Value and Keys Primitive Root.
      {--keygen}     This will cause the program to generate Rotator Key Pairs. 
                               value on a valid charater in the List.
+     {--curve}      Followed by {"x25519"} makes --keygen create elliptic curve Key Pairs,
+                              this must come before --keygen. Needs the cryptography package.
      {--keypub}     Outputs the current Public Rotator Key to Share with others.
      {--keylist}    List the contents of your Public Key Ring.
      {--keyadd}     Adds an entry from your Public Key Ring.
@@ -107,6 +118,7 @@ def CmdLineParser():
      global Justify
      global KeyPair
      global KeyPairName
+     global KeyCurve
      global Leap
      global Outfile
      global PassSet
@@ -153,6 +165,11 @@ def CmdLineParser():
              WordList = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789abcdefghijklmnopqrstuvwxyz"
          elif ARG[1] == "--expanded":                                      # Sets Expanded Key List
              WordList = "AaBbCcDdEeFfGgHhIiJjKkLlMmNnOoPpQqRrSsTtUuVvWwXxYyZz 0123456789"
+         elif ARG[1] == "--wordfile":                                      # Sets Key List from a file
+             if len(ARG) > 2:
+                 WordList = LoadWordList(ARG[2])
+                 DebugOut += " + ["+str(ARG[2])+"]"
+                 del ARG[2]
          elif  ARG[1] == "-s" or ARG[1].lower() == "--shift":              # Set Shift Value
              if len(ARG) > 1:                                              # Confirming Next Value is Int and storing.
                  tmpShift = re.compile(r'[^\d.]+')
@@ -168,6 +185,11 @@ def CmdLineParser():
                  KeyPair = True
                  DebugOut += " + ["+str(ARG[2])+"]"
                  del ARG[2]
+         elif ARG[1].lower() == "--curve":                                  # Sets the Key Pair backend for --keygen.
+             if len(ARG) > 2:
+                 KeyCurve = "x25519" if ARG[2].lower() == "x25519" else ""
+                 DebugOut += " + ["+str(ARG[2])+"]"
+                 del ARG[2]
          elif ARG[1].lower() == "--keygen": generateNewKeys()               # Will generate and store Rotator Key Pairs.
          elif ARG[1].lower() == "--keyroot": generateRoot()                 # Will generate new Keys Prime Value and Keys Primitive Root.
          elif ARG[1].lower() == "--keypublic": showPublicKey()              # Will display your current Public Key.
@@ -281,10 +303,16 @@ def generateNewKeys():
     passRoot = int("".join(map(str, Rotate)))
 
     print("- Public and Private Keys have been generated.")
-    PrivateKey = getPrime(14)
-    SecureKey = PrivateKey + passRoot
-    PublicKey = PublicKey = (root ** PrivateKey) % prime
-    Keys = [ "MSprv:"+str(SecureKey), "MSpub:"+str(PublicKey) ]
+    if KeyCurve == "x25519":
+        PrivateKey = random.SystemRandom().getrandbits(256)
+        SecureKey = PrivateKey + passRoot
+        PublicKey = curvePublicKey(PrivateKey)
+        Keys = [ "MSxprv:"+str(SecureKey), "MSxpub:"+str(PublicKey) ]
+    else:
+        PrivateKey = getPrime(14)
+        SecureKey = PrivateKey + passRoot
+        PublicKey = pow(root, PrivateKey, prime)
+        Keys = [ "MSprv:"+str(SecureKey), "MSpub:"+str(PublicKey) ]
 
     # Saving Keys to filesystem
     if not os.path.exists(DefaultKeyFolder): os.makedirs(DefaultKeyFolder)
@@ -302,12 +330,39 @@ def generateNewKeys():
     print("- Rotator Key Pairs have been generated and stored.\n\nTo view your Public Key: MScipher --keypublic\n")
     sys.exit()
 
+# Rotator Key Pairs: X25519 public key for a private key number (elliptic curve backend).
+def curvePublicKey(inPrivateKey):
+    from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+    from cryptography.hazmat.primitives import serialization
+    Key = X25519PrivateKey.from_private_bytes(inPrivateKey.to_bytes(32, "little"))
+    return int.from_bytes(Key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw), "little")
+
+# Rotator Key Pairs: X25519 shared key from a Public Key Ring entry and our private key number.
+def curveSharedKey(inPublicKey, inPrivateKey):
+    from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
+    Key = X25519PrivateKey.from_private_bytes(inPrivateKey.to_bytes(32, "little"))
+    return int.from_bytes(Key.exchange(X25519PublicKey.from_public_bytes(inPublicKey.to_bytes(32, "little"))), "little")
+
+# Rotator Key Pairs: Splits a Public Key into its type and number. "MSxpub:" keys are X25519,
+#    "MSpub:" keys and bare numbers (older Key Rings) are Prime/Root keys. Returns None if invalid.
+def parsePublicKey(inPublicKey):
+     inPublicKey = inPublicKey.strip()
+     Curve = inPublicKey[:7] == "MSxpub:"
+     if Curve: inPublicKey = inPublicKey[7:]
+     elif inPublicKey[:6] == "MSpub:": inPublicKey = inPublicKey[6:]
+     if not inPublicKey.isdigit(): return None
+     return Curve, int(inPublicKey)
+
 # Rotator Key Pairs: Add a person Public Key to the Rotator Key Ring.
 def addPublicKeyRing(inName):
      if inName == "":
           print("SYNTAX: MScipher --keyadd <user_name>")
           sys.exit()
-     inPublicKey = input("\nEnter Public Key for " + inName + ": ")
+     PublicKey = parsePublicKey(input("\nEnter Public Key for " + inName + ": "))
+     if PublicKey is None:
+          print("\nMScipher: A Public Key is a number, optionally starting with MSpub: or MSxpub:\n")
+          sys.exit()
+     inPublicKey = ("MSxpub:" if PublicKey[0] else "MSpub:") + str(PublicKey[1])
      if not os.path.exists(DefaultKeyFolder + "/MSc.keys"): 
          f = open(DefaultKeyFolder + "/MSc.keys", "x")
          f.write("MScipher Public Key Ring Storage File.\n" +
@@ -346,40 +401,6 @@ def generateRoot():
     sys.exit()
 
 
-# Checking if Shift is larger than the WordLst length. If so it does a Modular to
-#   length to get Shift Value.
-def CreateShift(inShift, inList, inDebug):
-     if inShift >= len(inList):
-         if inDebug: print("- LEN[->] pSHF["+str(inShift)+"] MOD["+str(inShift) + "-INT("+str(inShift) + "/" + 
-             str(len(inList)) + ")] SHF[" + str(inShift % len(inList)) + "]")
-         inShift = inShift % len(inList)
-     else:
-         if inDebug: print("- LEN[..] SHF["+str(inShift)+"]\n")
-     return inShift
-
-# Creating Shifted Set (Values are: Left, Mid, Right)
-def Ceasar(inShift, inDir , inLst, inDebug):
-     if inDir == 'Mid':
-         if inShift < int(len(WordList) / 2): inDir = 'Left'
-         else: inDir = 'Right'
-     if inDir == 'Right': inShift *= -1
-     if inDebug: print("- " + inDir[0], end ="")
-     return inLst[inShift:] + inLst[:inShift]
-
-# Getting Rotate Values from Password using Intial Shifted List.
-def CreateRotators(inCipher, inPass, inConvert, inDebug):
-     tmpRotate = []
-     if inDebug: print("\n- LEN[" + str(len(inCipher)).rjust(2, ' ') + "] LST["+ inCipher +"]")
-
-     if inConvert: inPass = inPass.upper()
-     for char in inPass:
-         if Convert: tmpRotate.append(inCipher.find(char.upper()))
-         else: tmpRotate.append(inCipher.find(char))
-
-         if inDebug: print("# CHAR[" + str(char) +"] POS[" + str(tmpRotate[-1]).rjust(2, ' ') + "]")
-     if inDebug: print("- LEN[" + str(len(tmpRotate)).rjust(2, ' ') + "] ROT" + str(tmpRotate)+"\n")
-     return tmpRotate
-
 # Rotator Key Pairs: Converts Public
 def KeyRotators(inWordList, inKey, inDebug):
      ListLength = len(inWordList)
@@ -406,11 +427,15 @@ def CreateCipherKey(inName, inDebug):
           f.close()
           for Key in Keys:
                if Key[:len(inName)] == inName:
-                   UserPublicKey = int(Key[len(inName)+1:-1])
+                   UserPublicKey = parsePublicKey(Key[len(inName)+1:])
                    KeyFound = True 
           if not KeyFound: 
                print("\nMScipher:",inName, "was not locate in the Public Key Ring!\n")
                sys.exit()
+          if UserPublicKey is None:
+               print("\nMScipher: The Public Key Ring entry for", inName, "is not a valid Public Key!\n")
+               sys.exit()
+          UserCurve, UserPublicKey = UserPublicKey
      if inDebug: print(" ["+str(UserPublicKey)+"]")
 
      if inDebug: print("- Loading Your Private Key.")
@@ -419,7 +444,14 @@ def CreateCipherKey(inName, inDebug):
           f = open(DefaultKeyFolder + "/MSc.prv", "r")
           PrivateKey = f.read()
           f.close()
-     PrivateKey = int(PrivateKey[6:])
+     Curve = PrivateKey[:7] == "MSxprv:"
+     PrivateKey = int(PrivateKey[7:]) if Curve else int(PrivateKey[6:])
+     # Both people have to use the same kind of Key Pairs, mixing them gives an unrelated shared key.
+     if Curve != UserCurve:
+          print("\nMScipher: Your Private Key is " + ("an X25519 (MSxprv)" if Curve else "a Prime/Root (MSprv)") +
+                " key but the Public Key for " + inName + " is " + ("an X25519 (MSxpub)" if UserCurve else "a Prime/Root (MSpub)") +
+                " key!\n")
+          sys.exit()
      inPasswd = input("Please Enter your Key Ring Password: ")
      if inDebug: print("- Deciphering Private Key.\n")
      WordList = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
@@ -428,97 +460,21 @@ def CreateCipherKey(inName, inDebug):
      Rotate = CreateRotators(Cipher, inPasswd, True, False)
      passRoot = int("".join(map(str, Rotate)))
      PrivateKey = PrivateKey - passRoot
+     if Curve:
+          # Elliptic curve keys are checked against the stored Public Key instead of by length.
+          MyPublicKey = ""
+          if os.path.exists(DefaultKeyFolder + "/MSc.pub"):
+               f = open(DefaultKeyFolder + "/MSc.pub", "r")
+               MyPublicKey = f.read().strip()
+               f.close()
+          if PrivateKey < 0 or PrivateKey >= 2**256 or MyPublicKey != "MSxpub:" + str(curvePublicKey(PrivateKey)):
+               print("\nMScipher: Invalid Private Key Password!\n")
+               sys.exit()
+          return curveSharedKey(UserPublicKey, PrivateKey)
      if len(str(PrivateKey)) > 6:
           print("\nMScipher: Invalid Private Key Password!\n")
           sys.exit()
-     return (UserPublicKey ** PrivateKey) % prime
-
-# Encript Text string with rotate keys.
-def Encrypt(inShift, inJustify, inRotate, inWordList, inText, inConvert, inLeap, inDebug):
-     CipherText = ""
-     lpRotate = 0
-     LenWordList = len(inWordList)
-
-     if inConvert: inWordList = inWordList.upper()
-     for inChar in inText:
-         if (inLeap and inConvert and inWordList.find(inChar.upper()) == -1) or (inLeap and inConvert == False and inWordList.find(inChar) == -1):
-             EncodedChar = inChar
-             if inDebug: print("- S[" + inChar + "] pSHF[--] ROT[--] " + ("-"*len(ShiftLst)) + " SFT[--] POS[--] = [" + EncodedChar + "]")
-         else:
-             # Gets Shift + Rotate Vaule, if larger than List it subtracts List Length from Shift.
-             preShift = inShift
-             inShift = inShift + inRotate[lpRotate]
-             if inShift > LenWordList: inShift -= LenWordList
-             # Converts all letters to uppercase and finds character position
-             if inConvert: PosChar = inWordList.find(inChar.upper())
-             else: PosChar = inWordList.find(inChar)
-
-             # Creates new list for new Shift position
-             ShiftLst = Ceasar(inShift, inJustify, inWordList, inDebug)
-             # Grabs character from new list using found position.
-             if PosChar != -1: EncodedChar = ShiftLst[PosChar]
-             else: EncodedChar = inChar
-             if inDebug: print("[" + inChar + "] pSHF["+str(preShift).rjust(2, ' ')+"] ROT["+str(inRotate[lpRotate]).rjust(2, ' ')+"] " + 
-                 ShiftLst + " SFT["+ str(inShift).rjust(2, ' ') + "] POS["+ str(PosChar).rjust(2, ' ') + "] = [" + EncodedChar + "]")
-             # Checks to see that we have not used all the Rotate Values, if so it starts over.
-             if lpRotate == len(inRotate) - 1:
-                 lpRotate = 0
-             else:
-                 lpRotate += 1
-         # Appends new character to Ciphered Text
-         CipherText += EncodedChar
-
-     if inDebug:
-         print(" ")
-         print("- PlainText: " + inText)
-         print("- Encrypted: " + CipherText)
-         print(" ")
-     return CipherText
-
-# Decript Cripted string with rotate keys.
-def Decrypt(inShift, inJustify, inRotate, inWordList, inText, inConvert, inLeap, inDebug):
-     PlainText = ""
-     lpRotate = 0
-     LenWordList = len(inWordList)
-
-     if inConvert: inWordList = inWordList.upper()
-     for inChar in inText:
-         if (inLeap and inConvert and inWordList.find(inChar.upper()) == -1) or (inLeap and inConvert == False and inWordList.find(inChar) == -1):
-             DecodedChar = inChar
-             if inDebug: print("- S[" + inChar + "] pSHF[--] ROT[--] " + ("-"*len(ShiftLst)) + " SFT[--] POS[--] = [" + DecodedChar + "]")
-         else:
-             preShift = inShift
-             # Gets Shift + Rotate Vaule, if larger than List it subtracts List Length from Shift.
-             inShift = inShift + inRotate[lpRotate]
-             if inShift > LenWordList: inShift -= LenWordList
-
-             # Creates new list for new Shift position
-             ShiftLst = Ceasar(inShift, inJustify ,inWordList, inDebug)
-             # Converts all letters to uppercase and finds character position
-             if inConvert: PosChar = ShiftLst.find(inChar.upper())
-             else: PosChar = ShiftLst.find(inChar)
-
-             # Grabs character from new list using found position.
-             if PosChar != -1: DecodedChar = inWordList[PosChar]
-             else: DecodedChar = inChar
-             if inDebug: print("[" + inChar + "] pSHF["+str(preShift).rjust(2, ' ')+"] ROT["+str(inRotate[lpRotate]).rjust(2, ' ')+"] " + 
-                 ShiftLst + " SFT["+ str(inShift).rjust(2, ' ') + "] POS["+ str(PosChar).rjust(2, ' ') + "] = [" + DecodedChar + "]")
-
-             # Checks to see that we have not used all the Rotate Values, if so it starts over.
-             if lpRotate == len(inRotate) - 1:
-                 lpRotate = 0
-             else:
-                 lpRotate += 1
-         # Appends new character to Ciphered Text
-         PlainText += DecodedChar
-
-     if inDebug:
-         print(" ")
-         print("- Encrypted: " + inText)
-         print("- PlainText: " + PlainText)
-         print(" ")
-     return PlainText
-
+     return pow(UserPublicKey, PrivateKey, prime)
 
 # Main Routines
 signal.signal(signal.SIGINT, handler)
@@ -17,7 +17,6 @@
 import argparse          # Command-line argument parsing
 import getpass           # Secure password input (no echo)
 import os                # Operating system interface (os.urandom for crypto-random bytes)
-import itertools         # Tools for iterators (itertools.cycle for pattern repeating)
 import math              # Mathematical functions (math.log2 for entropy calculation)
 import collections       # High-performance container datatypes (Counter for byte frequency)
 import sys               # Python runtime system access (arguments, I/O streams, exit handling, platform info)
@@ -35,6 +34,12 @@ from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 # Provides confidentiality + integrity (detects tampering)
 # Industry standard for symmetric encryption
 
+# THIRD-PARTY IMPORTS (requires: pip install numpy)
+# -------------------------------------------------------------------------------------------
+import numpy as np
+# NumPy: Whole-array byte gathers and scatters for the interleave engine
+# Replaces the per-byte Python loop with a precomputed index permutation
+
 # CONSTANTS
 # -------------------------------------------------------------------------------------------
 VERSION = "2.4"          # Tool version
@@ -216,99 +221,199 @@ def reassemble_payload(shares: list[bytes], original_len: int) -> bytes:
     combined = b''.join(shares)
     return combined[:original_len]
 
-def apply_pattern_and_noise(shares: list[bytes], pattern: str, noise_stream: int | None, debug: bool = False) -> bytes:
+def parse_pattern(pattern: str, num_streams: int) -> list[int]:
     # ───────────────────────────────────────────────────────────────────────────────────────
-    # Interleave stream shares using a repeating numeric pattern.
-    # Optionally insert one cryptographically random byte after every byte
-    # from a chosen stream (noise_stream).
+    # Convert a numeric pattern string to 0-based stream indices.
 
-    # Example pattern "123321" → byte order: S1, S2, S3, S3, S2, S1, ...
+    # Every digit must name one of the streams (1 .. num_streams).
     # ───────────────────────────────────────────────────────────────────────────────────────
     pattern_list = [int(c) - 1 for c in pattern if c.isdigit()]  # Convert to 0-based indices
     if not pattern_list:
         raise ValueError("Invalid pattern — must contain digits")
+    for idx in pattern_list:
+        if not 0 <= idx < num_streams:
+            raise ValueError(f"Invalid pattern — stream {idx + 1} does not exist (streams: {num_streams})")
+    return pattern_list
 
-    if debug:
-        print(f"[DEBUG] Using pattern: {pattern} → {pattern_list} (0-based)")
-
-    cycle = itertools.cycle(pattern_list)
-    output = bytearray()
-    pointers = [0] * len(shares)
-
-    bytes_emitted = 0
-    noise_added = 0
+def interleave_order(lengths: list[int], pattern_list: list[int], noise_stream: int | None = None) -> tuple:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Precompute the interleaved byte order for the given stream lengths and pattern.
+
+    # Byte k of stream s is written at the k-th time s comes up in the repeating pattern:
+    #     step = (k // c) * len(pattern) + occ[k % c]
+    # where c is how often s appears in one pattern cycle and occ lists those positions.
+
+    # While every stream still has data each pattern cycle has the same shape, so those
+    # full cycles are described once as columns of a (cycles x width) table that is
+    # filled with strided copies. Once a stream runs out its steps are skipped: the
+    # remaining (tail) steps are scattered into slots and the empty slots compressed out.
+
+    # Returns: (full, columns, width, tail_order, tail_streams)
+    # - full: number of full pattern cycles
+    # - columns: (stream, rank, column) for each pattern position; byte rank of that
+    #   stream's cycle goes to that column, a noise byte (if any) goes in the next column
+    # - width: bytes written per full cycle, noise included
+    # - tail_order: index into the joined shares for each tail byte, in output order
+    # - tail_streams: 0-based stream number of each tail byte
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    period = len(pattern_list)
+    pattern = np.array(pattern_list, dtype=np.int64)
+    counts = np.bincount(pattern, minlength=len(lengths))
+    for s, n in enumerate(lengths):
+        if n and not counts[s]:
+            raise ValueError(f"Invalid pattern — stream {s + 1} is never used by the pattern")
+    starts = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+
+    columns = []
+    column = 0
+    for i, s in enumerate(pattern_list):
+        columns.append((s, pattern_list[:i].count(s), column))
+        column += 2 if noise_stream == s + 1 else 1
+    full = min((n // counts[s] for s, n in enumerate(lengths) if counts[s]), default=0)
+
+    # Tail: the steps left over once the first stream runs out.
+    tail = []
+    for s, n in enumerate(lengths):
+        k = np.arange(full * counts[s], n, dtype=np.int64)
+        occ = np.flatnonzero(pattern == s)
+        tail.append(((k // max(counts[s], 1)) - full) * period + occ[k % counts[s]] if len(k) else k)
+    slots = np.full(max((int(t[-1]) + 1 for t in tail if len(t)), default=0), -1, dtype=np.int64)
+    for s, t in enumerate(tail):
+        slots[t] = starts[s] + full * counts[s] + np.arange(len(t), dtype=np.int64)
+    tail_order = slots[slots >= 0]
+    tail_streams = np.searchsorted(starts[1:-1], tail_order, side='right')
+    return int(full), columns, column, tail_order, tail_streams
+
+def cycle_views(payload: np.ndarray, lengths: list[int], pattern_list: list[int], full: int) -> list[np.ndarray]:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Views of each stream's full-cycle bytes as (cycles x uses per cycle) arrays.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    views = []
+    start = 0
+    for s, n in enumerate(lengths):
+        uses = pattern_list.count(s)
+        views.append(payload[start:start + full * uses].reshape(full, uses))
+        start += n
+    return views
 
-    while True:
-        stream_idx = next(cycle)
+def apply_pattern_and_noise(shares: list[bytes], pattern: str, noise_stream: int | None, debug: bool = False) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Interleave stream shares using a repeating numeric pattern.
+    # Optionally insert one cryptographically random byte after every byte
+    # from a chosen stream (noise_stream).
 
-        # Skip if this stream is fully consumed
-        if pointers[stream_idx] >= len(shares[stream_idx]):
-            continue
+    # Example pattern "123321" → byte order: S1, S2, S3, S3, S2, S1, ...
 
-        byte = shares[stream_idx][pointers[stream_idx]]
-        output.append(byte)
-        pointers[stream_idx] += 1
-        bytes_emitted += 1
+    # The byte order is computed up front by interleave_order(): full pattern cycles are
+    # strided column copies, the short tail is one NumPy gather, and all noise comes
+    # from a single os.urandom() call.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    pattern_list = parse_pattern(pattern, len(shares))
 
-        # Insert noise byte if configured
-        if noise_stream is not None and stream_idx + 1 == noise_stream:
-            noise_byte = os.urandom(1)[0]
-            output.append(noise_byte)
-            noise_added += 1
-            if debug and noise_added <= 5:
-                print(f"[DEBUG] Added noise byte after stream {noise_stream}: 0x{noise_byte:02x}")
+    if debug:
+        print(f"[DEBUG] Using pattern: {pattern} → {pattern_list} (0-based)")
 
-        # Exit when all real data has been written
-        if all(pointers[i] >= len(shares[i]) for i in range(len(shares))):
-            break
+    lengths = [len(share) for share in shares]
+    payload = np.frombuffer(b''.join(shares), dtype=np.uint8)
+    full, columns, width, tail_order, tail_streams = interleave_order(lengths, pattern_list, noise_stream)
+
+    # Noise goes after every byte of the noise stream: in the full cycles that is the
+    # column after each of its pattern positions, in the tail it shifts later bytes right.
+    noise_columns = [column + 1 for s, rank, column in columns if s + 1 == noise_stream]
+    is_noise = tail_streams == (noise_stream - 1 if noise_stream is not None else -1)
+    tail_noise = int(is_noise.sum())
+    noise_added = full * len(noise_columns) + tail_noise
+    noise = np.frombuffer(os.urandom(noise_added), dtype=np.uint8)
+
+    output = np.empty(full * width + len(tail_order) + tail_noise, dtype=np.uint8)
+    head = output[:full * width].reshape(full, width)
+    views = cycle_views(payload, lengths, pattern_list, full)
+    for s, rank, column in columns:
+        head[:, column] = views[s][:, rank]
+    if noise_columns:
+        head[:, noise_columns] = noise[:full * len(noise_columns)].reshape(full, len(noise_columns))
+
+    # Every tail byte moves right by the number of noise bytes written before it.
+    tail = output[full * width:]
+    positions = np.arange(len(tail_order), dtype=np.int64) + np.cumsum(is_noise) - is_noise
+    tail[positions] = payload[tail_order]
+    tail[positions[is_noise] + 1] = noise[full * len(noise_columns):]
 
     if debug:
+        for noise_byte in noise[:5]:
+            print(f"[DEBUG] Added noise byte after stream {noise_stream}: 0x{noise_byte:02x}")
         print(f"[DEBUG] Interleave complete:")
-        print(f"[DEBUG] - Real bytes emitted: {bytes_emitted}")
+        print(f"[DEBUG] - Real bytes emitted: {len(payload)}")
         print(f"[DEBUG] - Noise bytes added:  {noise_added}")
         print(f"[DEBUG] - Final output size:  {len(output)} bytes")
 
-    return bytes(output)
+    return output.tobytes()
+
+def payload_length(total: int, num_streams: int, noise_stream: int | None) -> int:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Work out the encrypted payload length from the interleaved length.
+
+    # With noise after stream K the file holds the payload plus one noise byte for each
+    # byte of stream K, so:  total = P + len(stream K of P)
+    # That grows by at least one for every extra payload byte, so there is at most one P.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if noise_stream is None or not 1 <= noise_stream <= num_streams:
+        return total
+    guess = total * num_streams // (num_streams + 1)
+    for length in range(max(0, guess - 2), guess + 3):
+        share = length // num_streams + (1 if noise_stream - 1 < length % num_streams else 0)
+        if length + share == total:
+            return length
+    raise ValueError(f"Input length {total} does not fit {num_streams} streams with noise after stream {noise_stream}")
 
 def deinterleave_with_noise_removal(interleaved: bytes, pattern: str, num_streams: int, noise_stream: int | None, debug: bool = False) -> list[bytes]:
     # ───────────────────────────────────────────────────────────────────────────────────────
     # Reverse the interleaving process.
     # Automatically skips noise bytes if noise_stream is specified.
+
+    # The stream lengths follow from the file length, so the same interleave_order() used
+    # to encode says where every real byte and every noise byte sits. The full cycles are
+    # copied back with strided column copies and the tail with one NumPy scatter. This
+    # also handles patterns that use the streams unevenly.
     # ───────────────────────────────────────────────────────────────────────────────────────
-    pattern_list = [int(c) - 1 for c in pattern if c.isdigit()]
-    cycle = itertools.cycle(pattern_list)
-    shares = [bytearray() for _ in range(num_streams)]
-    i = 0
-    noise_skipped = 0
+    pattern_list = parse_pattern(pattern, num_streams)
 
     if debug:
         print(f"[DEBUG] Deinterleaving {len(interleaved)} bytes with pattern {pattern}")
 
-    while i < len(interleaved):
-        current_stream = next(cycle)
-        if i >= len(interleaved):
-            break
+    total = payload_length(len(interleaved), num_streams, noise_stream)
+    lengths = [total // num_streams + (1 if i < total % num_streams else 0) for i in range(num_streams)]
+    full, columns, width, tail_order, tail_streams = interleave_order(lengths, pattern_list, noise_stream)
 
-        byte = interleaved[i]
-        i += 1
-        shares[current_stream].append(byte)
+    data = np.frombuffer(interleaved, dtype=np.uint8)
+    payload = np.empty(total, dtype=np.uint8)
+    head = data[:full * width].reshape(full, width)
+    views = cycle_views(payload, lengths, pattern_list, full)
+    for s, rank, column in columns:
+        views[s][:, rank] = head[:, column]
 
-        # Skip the following byte if it was noise
-        if noise_stream is not None and current_stream + 1 == noise_stream:
-            if i < len(interleaved):
-                skipped = interleaved[i]
-                i += 1
-                noise_skipped += 1
-                if debug and noise_skipped <= 5:
-                    print(f"[DEBUG] Skipped noise byte: 0x{skipped:02x}")
+    tail = data[full * width:]
+    is_noise = tail_streams == (noise_stream - 1 if noise_stream is not None else -1)
+    positions = np.arange(len(tail_order), dtype=np.int64) + np.cumsum(is_noise) - is_noise
+    payload[tail_order] = tail[positions]
+
+    noise_skipped = len(interleaved) - total
+    if debug:
+        noise_columns = [column + 1 for s, rank, column in columns if s + 1 == noise_stream]
+        skipped = np.concatenate((head[:, noise_columns].ravel(), tail[positions[is_noise] + 1]))
+        for byte in skipped[:5]:
+            print(f"[DEBUG] Skipped noise byte: 0x{byte:02x}")
+
+    starts = np.concatenate(([0], np.cumsum(lengths)))
+    shares = [payload[starts[i]:starts[i + 1]].tobytes() for i in range(num_streams)]
 
     if debug:
         for idx, s in enumerate(shares):
             print(f"[DEBUG] Extracted stream {idx+1}: {len(s)} bytes")
         print(f"[DEBUG] Total noise bytes skipped: {noise_skipped}")
-        print(f"[DEBUG] Total bytes processed: {i}")
+        print(f"[DEBUG] Total bytes processed: {len(interleaved)}")
 
-    return [bytes(s) for s in shares]
+    return shares
 
 def bytes_to_hex_text(data: bytes, width: int = 80) -> str:
     # ───────────────────────────────────────────────────────────────────────────────────────
@@ -382,12 +487,17 @@ def analyze_file(interleaved: bytes, num_streams: int, pattern: str, noise_k: in
     print(f"- Configured pattern: {pattern}")
     print(f"- Noise insertion: {'After stream ' + str(noise_k) if noise_k else 'Disabled'}")
 
-    shares = deinterleave_with_noise_removal(interleaved, pattern, num_streams, noise_k, debug=False)
-    print("\n- Deinterleaved stream lengths:")
-    for i, s in enumerate(shares, 1):
-        print(f"  + Stream {i}: {len(s):5d} bytes  ({len(s)/len(interleaved)*100:5.1f}%)")
-
-    if noise_k:
+    try:
+        shares = deinterleave_with_noise_removal(interleaved, pattern, num_streams, noise_k, debug=False)
+    except ValueError as e:
+        shares = None
+        print(f"\n[WARN] Streams could not be separated: {e}")
+    if shares is not None:
+        print("\n- Deinterleaved stream lengths:")
+        for i, s in enumerate(shares, 1):
+            print(f"  + Stream {i}: {len(s):5d} bytes  ({len(s)/len(interleaved)*100:5.1f}%)")
+
+    if noise_k and shares is not None:
         noise_bytes = len(interleaved) - sum(len(s) for s in shares)
         print(f"  + Noise  : ESTIMATED BYTES: {noise_bytes} ({noise_bytes/len(interleaved)*100:.1f}%)")
 
@@ -496,24 +606,19 @@ def main():
 
         password = get_password("Enter your password: ")
 
-        shares = deinterleave_with_noise_removal(interleaved, pattern, num_streams, noise_k, debug=debug)
-
-        if debug:
-            for i, s in enumerate(shares, 1):
-                print(f"[DEBUG] Extracted stream {i}: {len(s)} bytes")
-
-        if noise_k is not None:     # Determine expected payload length
-            expected_payload_len = len(interleaved) - len(shares[noise_k - 1])
-        else:
-            expected_payload_len = len(interleaved)
+        try:
+            shares = deinterleave_with_noise_removal(interleaved, pattern, num_streams, noise_k, debug=debug)
 
-        if debug:
-            print(f"[DEBUG] Expected payload length: {expected_payload_len}")
+            if debug:
+                for i, s in enumerate(shares, 1):
+                    print(f"[DEBUG] Extracted stream {i}: {len(s)} bytes")
 
-        combined = b''.join(shares)
-        payload = combined[:expected_payload_len]
+            # The shares come back at their exact lengths, so this is the payload length.
+            expected_payload_len = sum(len(s) for s in shares)
+            if debug:
+                print(f"[DEBUG] Expected payload length: {expected_payload_len}")
 
-        try:
+            payload = b''.join(shares)
             decrypted = decrypt_data(payload, password, debug)
 
             if args.outfile:
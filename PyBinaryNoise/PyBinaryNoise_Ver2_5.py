@@ -0,0 +1,2034 @@
+#!/usr/bin/env python3
+# PyBinaryNoise
+# -------------------------------------------------------------------------------------------
+# A secure, lightweight file obfuscation tool using password-based encryption,
+# stream splitting, custom interleaving patterns, and optional noise insertion.
+
+# Features:
+# - AES-GCM authenticated encryption
+# - Chunked streaming container (STREAM nonces, constant memory, pipes)
+# - Scrypt key derivation (once per run in batch mode, HKDF subkey per file)
+# - Configurable stream splitting and interleaving
+# - Optional single-byte noise insertion
+# - Binary or text (hex, base64, base85) output/input
+# - Forensic analysis mode (streaming statistics, entropy profile, JSON report)
+
+# STANDARD LIBRARY IMPORTS (preinstalled with Python — no pip needed)
+# -------------------------------------------------------------------------------------------
+import argparse          # Command-line argument parsing
+import getpass           # Secure password input (no echo)
+import os                # Operating system interface (os.urandom for crypto-random bytes)
+import math              # Mathematical functions (math.log2 for entropy calculation)
+import collections       # High-performance container datatypes (deque of pending segments)
+import sys               # Python runtime system access (arguments, I/O streams, exit handling, platform info)
+import struct            # Binary packing for the streaming container header
+import io                # Text wrapper for hex output on stdout
+import concurrent.futures # Thread pool for multi-core segment encryption (-jobs)
+import threading         # Lock around the shared Scrypt master key cache
+import json              # Batch mode manifest
+import time              # Timestamps for the batch manifest
+import mmap              # Memory-mapped input for zero-copy legacy decoding
+import stat              # Regular file check before memory-mapping
+import itertools         # Stream orders tried by -recover
+import binascii          # Hex and base64 conversion for the -text formats
+import tracemalloc       # Peak memory per phase for -bench
+import statistics        # Median timings for -bench
+import tempfile          # Scratch file for the -bench file I/O phases
+import platform          # Machine details in the -bench report
+import contextlib        # Timing spans for -profile
+import functools         # Phase decorator for -profile
+import cProfile          # Optional function-level profile (-cprofile)
+import pstats            # Summary of the -cprofile results
+import hashlib           # Streaming container marker (SHA-256 of the salts)
+import os                # OS-level functionality (filesystem paths, environment variables, process & platform detection)
+
+
+# THIRD-PARTY IMPORTS (requires: pip install cryptography)
+# -------------------------------------------------------------------------------------------
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+# Scrypt: Memory-hard key derivation function — resistant to GPU/ASIC attacks
+# Part of the 'cryptography' library (widely used, well-audited)
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+# AES-GCM: Authenticated encryption with associated data
+# Provides confidentiality + integrity (detects tampering)
+# Industry standard for symmetric encryption
+
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from cryptography.hazmat.primitives import hashes
+# HKDF-SHA256: Derives a fresh per-file key from the Scrypt master key and a file salt
+
+from cryptography.exceptions import InvalidTag
+# InvalidTag: Raised by AES-GCM when a segment fails authentication
+
+# THIRD-PARTY IMPORTS (requires: pip install numpy)
+# -------------------------------------------------------------------------------------------
+import numpy as np
+# NumPy: Whole-array byte gathers and scatters for the interleave engine
+# Replaces the per-byte Python loop with a precomputed index permutation
+
+# CONSTANTS
+# -------------------------------------------------------------------------------------------
+VERSION = "2.5"          # Tool version
+DEFAULT_STREAMS = 3      # Default number of streams if not specified
+DEFAULT_CHUNK = 1 << 20  # Default streaming segment size (1 MiB plaintext per segment)
+CONTAINER_MAGIC = b"PBN" # Streaming container magic (inside the encrypted header)
+CONTAINER_VERSION = 1    # Streaming container format version
+HEADER_FORMAT = ">3sBI"  # Magic, container version, segment size
+MARKER_LEN = 8           # Streaming container marker, checked before any key derivation
+PREAMBLE_LEN = 16 + 16 + MARKER_LEN + struct.calcsize(HEADER_FORMAT) + 16  # salt + file salt + marker + header + tag
+MANIFEST_NAME = "manifest.json"  # Batch mode manifest, written to the output directory
+BATCH_GIVE_UP = 8        # Batch stops when this many files fail before any succeeds
+ANALYZE_CHUNK = 4 << 20  # Bytes read per step by -analyze
+ANALYZE_WINDOW = 1 << 16 # Default window for the -analyze entropy profile
+ANALYZE_STEP = 1 << 16   # Bytes -analyze counts at a time (fits in the CPU cache)
+
+# Text formats for -text: alphabet, bytes per encoded group, characters per group
+TEXT_FORMATS = ['hex', 'base64', 'base85']
+B85_ALPHABET = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!#$%&()*+-;<=>?@^_`{|}~"
+TEXT_ALPHABETS = {
+    'hex': b"0123456789ABCDEFabcdef",
+    'base64': b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=",
+    'base85': B85_ALPHABET,
+}
+TEXT_GROUPS = {'hex': 1, 'base64': 3, 'base85': 4}
+TEXT_CHARS = {'hex': 2, 'base64': 4, 'base85': 5}
+TEXT_WHITESPACE = b" \t\r\n\v\f"
+HEX_UPPER = bytes.maketrans(b"abcdef", b"ABCDEF")
+B85_TABLE = np.frombuffer(B85_ALPHABET, dtype=np.uint8)
+B85_LOOKUP = np.full(256, 255, dtype=np.uint8)
+B85_LOOKUP[B85_TABLE] = np.arange(85, dtype=np.uint8)
+
+# File signatures reported by -analyze, and what it has to say about each
+FILE_MAGIC = [(b"PK\x03\x04", "ZIP"), (b"%PDF", "PDF"), (b"\x89PNG", "PNG"), (b"GIF8", "GIF")]
+MAGIC_COMMENTS = {
+    "ZIP": "[ZIP_] ZIP file magic detected! Someone hiding archives in noise?",
+    "PDF": "[PDF_] PDF header detected. Classic stego move.",
+    "PNG": "[PNG_] PNG image detected. Very sneaky.",
+    "GIF": "[GIF_] GIF detected. 90s called, they want their container back.",
+}
+
+# PROFILING
+# -------------------------------------------------------------------------------------------
+class Profiler:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Per-phase wall and CPU time for -profile.
+
+    # Each phase() span records its wall time, the CPU time of the thread it ran on
+    # and (optionally) the bytes it handled. Spans from worker threads (-jobs) keep
+    # their own thread id, so the Chrome trace shows them side by side.
+    # Disabled (the default) phase() returns a shared no-op context: no timing cost.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.null = contextlib.nullcontext()
+
+    def enable(self):
+        self.enabled = True
+        self.events = []
+        self.origin = time.perf_counter()
+
+    def phase(self, name: str, size: int | None = None):
+        return self.span(name, size) if self.enabled else self.null
+
+    @contextlib.contextmanager
+    def span(self, name: str, size: int | None):
+        event = {"name": name, "tid": threading.get_ident(), "bytes": size}
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield event
+        finally:
+            event.update(start=wall - self.origin, wall=time.perf_counter() - wall, cpu=time.thread_time() - cpu)
+            with self.lock:
+                self.events.append(event)
+
+    def summary(self) -> dict:
+        # Totals per phase, in the order phases first ran
+        phases = {}
+        for event in self.events:
+            total = phases.setdefault(event["name"], {"calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "bytes": 0})
+            total["calls"] += 1
+            total["wall_ms"] += event["wall"] * 1000
+            total["cpu_ms"] += event["cpu"] * 1000
+            total["bytes"] += event["bytes"] or 0
+        return phases
+
+    def chrome_trace(self) -> dict:
+        # Chrome trace event format (chrome://tracing, Perfetto, speedscope): complete
+        # events ("ph": "X") with microsecond timestamps.
+        threads = {}
+        events = []
+        for event in sorted(self.events, key=lambda e: e["start"]):
+            tid = threads.setdefault(event["tid"], len(threads))
+            args = {"cpu_ms": round(event["cpu"] * 1000, 3)}
+            if event["bytes"] is not None:
+                args["bytes"] = event["bytes"]
+            events.append({"name": event["name"], "cat": "phase", "ph": "X", "pid": os.getpid(), "tid": tid,
+                           "ts": round(event["start"] * 1e6, 1), "dur": round(event["wall"] * 1e6, 1), "args": args})
+        for ident, tid in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                           "args": {"name": "main" if ident == threading.main_thread().ident else f"worker {tid}"}})
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"tool": f"PyBinaryNoise {VERSION}", "summary": self.summary()}}
+
+    def print_summary(self, wall: float, cpu: float, out=None):
+        out = out or sys.stderr
+        print(f"\n{'Phase':<14}{'Calls':>7}{'Wall ms':>12}{'CPU ms':>12}{'MB/s':>10}", file=out)
+        print("-" * 55, file=out)
+        for name, total in self.summary().items():
+            speed = f"{total['bytes'] / total['wall_ms'] / 1e3:10.1f}" if total["bytes"] and total["wall_ms"] else " " * 9 + "-"
+            print(f"{name:<14}{total['calls']:>7}{total['wall_ms']:12.2f}{total['cpu_ms']:12.2f}{speed}", file=out)
+        print(f"{'total':<14}{'':>7}{wall * 1000:12.2f}{cpu * 1000:12.2f}", file=out)
+
+PROFILE = Profiler()     # Shared by every phase; enabled by -profile
+
+def profiled(name: str, measure=None):
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Decorator: run the function as a PROFILE phase. measure(args, result), when given,
+    # returns the bytes handled; the span's bytes are filled in once the call returns.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    def wrap(fn):
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            if not PROFILE.enabled:
+                return fn(*args, **kwargs)
+            with PROFILE.span(name, None) as event:
+                result = fn(*args, **kwargs)
+                if measure:
+                    event["bytes"] = measure(args, result)
+                return result
+        return run
+    return wrap
+
+# FUNCTIONS
+# -------------------------------------------------------------------------------------------
+@profiled("kdf")
+def derive_key(password: str, salt: bytes) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Derive a 32-byte encryption key from a password using Scrypt.
+    # Scrypt is deliberately slow and memory-intensive to make brute-force attacks
+    # much harder (even with powerful hardware).
+
+    # Args:
+    # - password: User-provided passphrase
+    # - salt: 16-byte random salt (unique per file)
+
+    # Returns: 32-byte cryptographic key
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    kdf = Scrypt(
+        salt=salt,      # salt: 16-byte random salt (unique per file)
+        length=32,      # 256-bit key
+        n=2**14,        # CPU/memory cost parameter (16384) — good modern balance
+        r=8,            # Block size
+        p=1             # Parallelism
+    )
+    return kdf.derive(password.encode('utf-8'))
+
+def get_password(prompt="Password: "):
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Securely read a password from the terminal with masked input.
+    #
+    # Automatically detects the operating system and selects the safest
+    # supported method:
+    # - Windows: uses getpass (native secure input, no echo)
+    # - Linux/macOS: uses raw terminal control to display '*' for each character
+    #
+    # When stdin is a pipe (data being streamed in) the password is read from the
+    # controlling terminal (/dev/tty) instead.
+    #
+    # This function prevents password leakage via terminal echo and ensures
+    # compatibility across major platforms.
+    #
+    # Args:
+    # - prompt: Text displayed to the user before password entry
+    #
+    # Returns:
+    # - password: User-entered password as a string
+    # ───────────────────────────────────────────────────────────────────────────────────────
+
+    # Windows platform (os.name == "nt")
+    if os.name == "nt":
+        import getpass                       # Secure password input (no echo)
+        return getpass.getpass(prompt)
+
+    # Unix-like platforms (Linux / macOS)
+    else:
+        import termios                       # POSIX terminal control
+        import tty                           # Terminal mode management
+
+        sys.stdout.write(prompt)             # Display prompt without newline
+        sys.stdout.flush()                   # Ensure prompt is shown immediately
+
+        password = ""
+        term = sys.stdin if sys.stdin.isatty() else open("/dev/tty", "r")
+        fd = term.fileno()                   # File descriptor for the terminal
+        old_settings = termios.tcgetattr(fd) # Save current terminal settings
+
+        try:
+            tty.setraw(fd)                   # Raw mode: read input one character at a time
+
+            while True:
+                ch = term.read(1)
+
+                # Enter / Return pressed → finish input
+                if ch in ('\r', '\n'):
+                    sys.stdout.write('\n')
+                    break
+
+                # Backspace / Delete → remove last character
+                elif ch in ('\x08', '\x7f'):
+                    if password:
+                        password = password[:-1]
+                        sys.stdout.write('\b \b')  # Erase last '*'
+                        sys.stdout.flush()
+
+                # Ctrl+C → allow user to abort safely
+                elif ch == '\x03':
+                    raise KeyboardInterrupt
+
+                # Any other printable character → mask input
+                else:
+                    password += ch
+                    sys.stdout.write('*')
+                    sys.stdout.flush()
+
+        finally:
+            # Always restore original terminal state to avoid terminal corruption
+            termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+            if term is not sys.stdin:
+                term.close()
+
+        print("")
+        return password
+
+def encrypt_data(data: bytes, password: str) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Encrypt data using AES-256-GCM with password-derived key.
+    # Output format: salt (16) + nonce (12) + ciphertext + auth tag (16)
+    # Total overhead: 44 bytes
+
+    # Args:
+    # - data: Plaintext bytes to encrypt
+    # - password: User passphrase
+
+    # Returns: Encrypted payload (can be safely stored/transmitted)
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    salt = os.urandom(16)                    # Random salt for key derivation
+    key = derive_key(password, salt)
+    aes = AESGCM(key)
+    nonce = os.urandom(12)                   # Unique nonce (never reuse!)
+    with PROFILE.phase("encrypt", len(data)):
+        ciphertext = aes.encrypt(nonce, data, associated_data=None)
+    return salt + nonce + ciphertext         # Self-contained encrypted blob
+
+def decrypt_data(payload: bytes, password: str, debug: bool = False) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Decrypt an AES-GCM encrypted payload.
+
+    # Automatically verifies authenticity — raises exception on tampering or wrong key.
+
+    # The payload is only sliced through a memoryview, so no copy of it is made; when it
+    # is writable (e.g. the buffer from deinterleave_into) it is decrypted in place.
+
+    # Args:
+    # - payload: Encrypted data from encrypt_data() (any bytes-like object)
+    # - password: Correct passphrase
+    # - debug: Print salt/nonce/ciphertext info
+
+    # Returns: Original plaintext (bytes, or a memoryview into payload)
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if len(payload) < 28:
+        raise ValueError("Payload too short — corrupted or invalid")
+
+    payload = memoryview(payload)
+    salt = bytes(payload[:16])
+    nonce = bytes(payload[16:28])
+    ciphertext = payload[28:]
+
+    key = derive_key(password, salt)
+    aes = AESGCM(key)
+
+    if debug:
+        print(f"[DEBUG] Salt: {salt.hex()}")
+        print(f"[DEBUG] Nonce: {nonce.hex()}")
+        print(f"[DEBUG] Ciphertext len: {len(ciphertext)}")
+
+    return aes_decrypt(aes, nonce, ciphertext)
+
+def aes_decrypt(aes: AESGCM, nonce: bytes, data, associated_data: bytes | None = None):
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # AES-GCM decrypt that avoids a second full-size buffer where it can.
+    # A writable buffer is decrypted in place with decrypt_into() (newer cryptography
+    # releases) and a memoryview of the plaintext is returned; otherwise, or on older
+    # releases, this is a normal decrypt() returning bytes.
+    # Raises InvalidTag just like decrypt().
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    view = memoryview(data)
+    with PROFILE.phase("decrypt", len(view)):
+        if view.readonly or not hasattr(aes, 'decrypt_into') or len(view) < 16:
+            return aes.decrypt(nonce, view, associated_data)
+        size = aes.decrypt_into(nonce, view, associated_data, view[:len(view) - 16])
+        return view[:size]
+
+def derive_file_key(master_key: bytes, file_salt: bytes) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Derive the per-file AES key for the streaming container.
+    # HKDF-SHA256 over the Scrypt master key with a random 16-byte file salt, so the
+    # slow Scrypt step can be shared while every file still gets its own key.
+
+    # Returns: 32-byte cryptographic key
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=file_salt,
+        info=b"PyBinaryNoise stream v1"
+    ).derive(master_key)
+
+def container_marker(salt: bytes, file_salt: bytes) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Marker that tells a streaming container from a legacy file without Scrypt.
+    # It is a hash of the two random salts, so it is different in every file and adds
+    # no fixed bytes; a legacy file matches it by chance with probability 2**-64.
+
+    # Returns: MARKER_LEN bytes
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    return hashlib.sha256(CONTAINER_MAGIC + salt + file_salt).digest()[:MARKER_LEN]
+
+class MasterKeys:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Scrypt master keys for one password, cached by salt.
+
+    # Every file encoded in a run shares one salt, so Scrypt runs once per run and
+    # each file only pays for an HKDF subkey. Decoding derives once per distinct salt,
+    # so a directory encoded in one batch also costs a single Scrypt run. Safe to use
+    # from several threads.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    def __init__(self, password: str):
+        self.password = password
+        self.keys = {}
+        self.pending = {}
+        self.salt = None
+        self.lock = threading.Lock()
+
+    def get(self, salt: bytes) -> bytes:
+        # Master key for a salt read from a file header. Different salts derive in
+        # parallel; threads asking for the same salt wait for the one derivation.
+        with self.lock:
+            if salt in self.keys:
+                return self.keys[salt]
+            pending = self.pending.setdefault(salt, threading.Lock())
+        with pending:
+            with self.lock:
+                if salt in self.keys:
+                    return self.keys[salt]
+            key = derive_key(self.password, salt)
+            with self.lock:
+                self.keys[salt] = key
+                del self.pending[salt]
+            return key
+
+    def encoding_key(self) -> tuple[bytes, bytes]:
+        # (salt, master key) used for every file encoded in this run
+        with self.lock:
+            if self.salt is None:
+                self.salt = os.urandom(16)
+                self.keys[self.salt] = derive_key(self.password, self.salt)
+            return self.salt, self.keys[self.salt]
+
+def stream_nonce(counter: int, last: bool) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # STREAM nonce for one segment: 7 zero bytes + 32-bit big-endian counter + last flag.
+    # Counter 0 is the header; segments count from 1. The last flag on the final
+    # segment means a file cut short at a segment boundary fails to decode.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if counter >= 1 << 32:
+        raise ValueError("Too many segments — use a larger -chunk size")
+    return bytes(7) + counter.to_bytes(4, 'big') + (b"\x01" if last else b"\x00")
+
+@profiled("split", lambda args, result: len(args[0]))
+def split_payload(payload: bytes, num_streams: int, debug: bool = False) -> list[bytes]:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Split encrypted payload into N nearly equal shares.
+
+    # No padding added — shorter streams are just shorter.
+    # This preserves exact byte count for perfect reconstruction.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    base_size = len(payload) // num_streams
+    remainder = len(payload) % num_streams
+
+    shares = []
+    pos = 0
+    for i in range(num_streams):
+        size = base_size + (1 if i < remainder else 0)
+        share = payload[pos:pos + size]
+        shares.append(share)
+        if debug:
+            print(f"[DEBUG] Stream {i+1}: {len(share)} bytes (bytes {pos}:{pos+size})")
+        pos += size
+
+    if debug:
+        total = sum(len(s) for s in shares)
+        print(f"[DEBUG] Split complete: total {total} bytes (original {len(payload)})")
+
+    return shares
+
+def reassemble_payload(shares: list[bytes], original_len: int) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Recombine stream shares and truncate to original encrypted payload length.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    combined = b''.join(shares)
+    return combined[:original_len]
+
+def parse_pattern(pattern: str, num_streams: int) -> list[int]:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Convert a numeric pattern string to 0-based stream indices.
+
+    # Every digit must name one of the streams (1 .. num_streams).
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    pattern_list = [int(c) - 1 for c in pattern if c.isdigit()]  # Convert to 0-based indices
+    if not pattern_list:
+        raise ValueError("Invalid pattern — must contain digits")
+    for idx in pattern_list:
+        if not 0 <= idx < num_streams:
+            raise ValueError(f"Invalid pattern — stream {idx + 1} does not exist (streams: {num_streams})")
+    return pattern_list
+
+def interleave_order(lengths: list[int], pattern_list: list[int], noise_stream: int | None = None) -> tuple:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Precompute the interleaved byte order for the given stream lengths and pattern.
+
+    # Byte k of stream s is written at the k-th time s comes up in the repeating pattern:
+    #     step = (k // c) * len(pattern) + occ[k % c]
+    # where c is how often s appears in one pattern cycle and occ lists those positions.
+
+    # While every stream still has data each pattern cycle has the same shape, so those
+    # full cycles are described once as columns of a (cycles x width) table that is
+    # filled with strided copies. Once a stream runs out its steps are skipped: the
+    # remaining (tail) steps are scattered into slots and the empty slots compressed out.
+
+    # Returns: (full, columns, width, tail_order, tail_streams)
+    # - full: number of full pattern cycles
+    # - columns: (stream, rank, column) for each pattern position; byte rank of that
+    #   stream's cycle goes to that column, a noise byte (if any) goes in the next column
+    # - width: bytes written per full cycle, noise included
+    # - tail_order: index into the joined shares for each tail byte, in output order
+    # - tail_streams: 0-based stream number of each tail byte
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    period = len(pattern_list)
+    pattern = np.array(pattern_list, dtype=np.int64)
+    counts = np.bincount(pattern, minlength=len(lengths))
+    for s, n in enumerate(lengths):
+        if n and not counts[s]:
+            raise ValueError(f"Invalid pattern — stream {s + 1} is never used by the pattern")
+    starts = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+
+    columns = []
+    column = 0
+    for i, s in enumerate(pattern_list):
+        columns.append((s, pattern_list[:i].count(s), column))
+        column += 2 if noise_stream == s + 1 else 1
+    full = min((n // counts[s] for s, n in enumerate(lengths) if counts[s]), default=0)
+
+    # Tail: the steps left over once the first stream runs out.
+    tail = []
+    for s, n in enumerate(lengths):
+        k = np.arange(full * counts[s], n, dtype=np.int64)
+        occ = np.flatnonzero(pattern == s)
+        tail.append(((k // max(counts[s], 1)) - full) * period + occ[k % counts[s]] if len(k) else k)
+    slots = np.full(max((int(t[-1]) + 1 for t in tail if len(t)), default=0), -1, dtype=np.int64)
+    for s, t in enumerate(tail):
+        slots[t] = starts[s] + full * counts[s] + np.arange(len(t), dtype=np.int64)
+    tail_order = slots[slots >= 0]
+    tail_streams = np.searchsorted(starts[1:-1], tail_order, side='right')
+    return int(full), columns, column, tail_order, tail_streams
+
+def cycle_views(payload: np.ndarray, lengths: list[int], pattern_list: list[int], full: int) -> list[np.ndarray]:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Views of each stream's full-cycle bytes as (cycles x uses per cycle) arrays.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    views = []
+    start = 0
+    for s, n in enumerate(lengths):
+        uses = pattern_list.count(s)
+        views.append(payload[start:start + full * uses].reshape(full, uses))
+        start += n
+    return views
+
+@profiled("interleave", lambda args, result: sum(len(share) for share in args[0]))
+def apply_pattern_and_noise(shares: list[bytes], pattern: str, noise_stream: int | None, debug: bool = False) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Interleave stream shares using a repeating numeric pattern.
+    # Optionally insert one cryptographically random byte after every byte
+    # from a chosen stream (noise_stream).
+
+    # Example pattern "123321" → byte order: S1, S2, S3, S3, S2, S1, ...
+
+    # The byte order is computed up front by interleave_order(): full pattern cycles are
+    # strided column copies, the short tail is one NumPy gather, and all noise comes
+    # from a single os.urandom() call.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    pattern_list = parse_pattern(pattern, len(shares))
+
+    if debug:
+        print(f"[DEBUG] Using pattern: {pattern} → {pattern_list} (0-based)")
+
+    lengths = [len(share) for share in shares]
+    payload = np.frombuffer(b''.join(shares), dtype=np.uint8)
+    full, columns, width, tail_order, tail_streams = interleave_order(lengths, pattern_list, noise_stream)
+
+    # Noise goes after every byte of the noise stream: in the full cycles that is the
+    # column after each of its pattern positions, in the tail it shifts later bytes right.
+    noise_columns = [column + 1 for s, rank, column in columns if s + 1 == noise_stream]
+    is_noise = tail_streams == (noise_stream - 1 if noise_stream is not None else -1)
+    tail_noise = int(is_noise.sum())
+    noise_added = full * len(noise_columns) + tail_noise
+    noise = np.frombuffer(os.urandom(noise_added), dtype=np.uint8)
+
+    output = np.empty(full * width + len(tail_order) + tail_noise, dtype=np.uint8)
+    head = output[:full * width].reshape(full, width)
+    views = cycle_views(payload, lengths, pattern_list, full)
+    for s, rank, column in columns:
+        head[:, column] = views[s][:, rank]
+    if noise_columns:
+        head[:, noise_columns] = noise[:full * len(noise_columns)].reshape(full, len(noise_columns))
+
+    # Every tail byte moves right by the number of noise bytes written before it.
+    tail = output[full * width:]
+    positions = np.arange(len(tail_order), dtype=np.int64) + np.cumsum(is_noise) - is_noise
+    tail[positions] = payload[tail_order]
+    tail[positions[is_noise] + 1] = noise[full * len(noise_columns):]
+
+    if debug:
+        for noise_byte in noise[:5]:
+            print(f"[DEBUG] Added noise byte after stream {noise_stream}: 0x{noise_byte:02x}")
+        print(f"[DEBUG] Interleave complete:")
+        print(f"[DEBUG] - Real bytes emitted: {len(payload)}")
+        print(f"[DEBUG] - Noise bytes added:  {noise_added}")
+        print(f"[DEBUG] - Final output size:  {len(output)} bytes")
+
+    return output.tobytes()
+
+def payload_length(total: int, num_streams: int, noise_stream: int | None) -> int:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Work out the encrypted payload length from the interleaved length.
+
+    # With noise after stream K the file holds the payload plus one noise byte for each
+    # byte of stream K, so:  total = P + len(stream K of P)
+    # That grows by at least one for every extra payload byte, so there is at most one P.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if noise_stream is None or not 1 <= noise_stream <= num_streams:
+        return total
+    guess = total * num_streams // (num_streams + 1)
+    for length in range(max(0, guess - 2), guess + 3):
+        share = length // num_streams + (1 if noise_stream - 1 < length % num_streams else 0)
+        if length + share == total:
+            return length
+    raise ValueError(f"Input length {total} does not fit {num_streams} streams with noise after stream {noise_stream}")
+
+@profiled("deinterleave", lambda args, result: len(args[0]))
+def deinterleave_into(interleaved, pattern: str, num_streams: int, noise_stream: int | None, debug: bool = False) -> tuple[np.ndarray, list[int]]:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Reverse the interleaving process into one preallocated buffer.
+    # Automatically skips noise bytes if noise_stream is specified.
+
+    # The stream lengths follow from the file length, so the same interleave_order() used
+    # to encode says where every real byte and every noise byte sits. The full cycles are
+    # copied back with strided column copies and the tail with one NumPy scatter. This
+    # also handles patterns that use the streams unevenly.
+
+    # interleaved may be any buffer (bytes, memoryview, mmap); it is read in place and
+    # every real byte is copied exactly once, straight to its place in the payload.
+
+    # Returns: (payload, lengths)
+    # - payload: writable uint8 array holding the shares back to back (the encrypted payload)
+    # - lengths: length of each share within payload
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    pattern_list = parse_pattern(pattern, num_streams)
+
+    if debug:
+        print(f"[DEBUG] Deinterleaving {len(interleaved)} bytes with pattern {pattern}")
+
+    total = payload_length(len(interleaved), num_streams, noise_stream)
+    lengths = [total // num_streams + (1 if i < total % num_streams else 0) for i in range(num_streams)]
+    full, columns, width, tail_order, tail_streams = interleave_order(lengths, pattern_list, noise_stream)
+
+    data = np.frombuffer(interleaved, dtype=np.uint8)
+    payload = np.empty(total, dtype=np.uint8)
+    head = data[:full * width].reshape(full, width)
+    views = cycle_views(payload, lengths, pattern_list, full)
+    for s, rank, column in columns:
+        views[s][:, rank] = head[:, column]
+
+    tail = data[full * width:]
+    is_noise = tail_streams == (noise_stream - 1 if noise_stream is not None else -1)
+    positions = np.arange(len(tail_order), dtype=np.int64) + np.cumsum(is_noise) - is_noise
+    payload[tail_order] = tail[positions]
+
+    noise_skipped = len(interleaved) - total
+    if debug:
+        noise_columns = [column + 1 for s, rank, column in columns if s + 1 == noise_stream]
+        skipped = np.concatenate((head[:, noise_columns].ravel(), tail[positions[is_noise] + 1]))
+        for byte in skipped[:5]:
+            print(f"[DEBUG] Skipped noise byte: 0x{byte:02x}")
+
+    if debug:
+        for idx, n in enumerate(lengths):
+            print(f"[DEBUG] Extracted stream {idx+1}: {n} bytes")
+        print(f"[DEBUG] Total noise bytes skipped: {noise_skipped}")
+        print(f"[DEBUG] Total bytes processed: {len(interleaved)}")
+
+    return payload, lengths
+
+def deinterleave_with_noise_removal(interleaved, pattern: str, num_streams: int, noise_stream: int | None, debug: bool = False) -> list[bytes]:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Reverse the interleaving process, returning each stream share as bytes.
+    # See deinterleave_into(); use that when the joined payload is all that is needed.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    payload, lengths = deinterleave_into(interleaved, pattern, num_streams, noise_stream, debug=debug)
+    starts = np.concatenate(([0], np.cumsum(lengths)))
+    return [payload[starts[i]:starts[i + 1]].tobytes() for i in range(num_streams)]
+
+def interleave_size(payload_len: int, num_streams: int, noise_stream: int | None) -> int:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Interleaved size of a payload: the payload plus one noise byte per noise-stream byte.
+    # The inverse of payload_length().
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if noise_stream is None or not 1 <= noise_stream <= num_streams:
+        return payload_len
+    return payload_len + payload_len // num_streams + (1 if noise_stream - 1 < payload_len % num_streams else 0)
+
+@profiled("read", lambda args, result: len(result))
+def read_exact(f, size: int) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Read up to size bytes, looping over short reads (pipes). Shorter only at end of file.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    parts = []
+    while size > 0:
+        part = f.read(size)
+        if not part:
+            break
+        parts.append(part)
+        size -= len(part)
+    return b''.join(parts)
+
+def map_input(infile, prefix: bytes):
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # The whole input for a legacy (single-shot) decode, prefix being what was already
+    # read from infile. A regular file is memory-mapped read-only, so it is never copied
+    # into the process; pipes and hex text are read into memory.
+    # Close the result (if it has close()) once it has been deinterleaved.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    try:
+        fileno = infile.fileno()
+        info = os.fstat(fileno)
+        mappable = stat.S_ISREG(info.st_mode) and info.st_size > 0 and infile.tell() == len(prefix)
+    except (AttributeError, OSError, ValueError):
+        mappable = False
+    if not mappable:
+        with PROFILE.phase("read"):
+            return prefix + infile.read()
+    # (mapped pages are read as deinterleave touches them)
+    return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+def parse_size(text: str) -> int:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Parse a byte size with an optional K / M / G suffix (powers of 1024), e.g. "1M".
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    text = text.strip().upper().rstrip('B')
+    try:
+        size = int(text[:-1]) * units[text[-1]] if text and text[-1] in units else int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r}")
+    if not 0 <= size < 1 << 32:
+        raise argparse.ArgumentTypeError("size must be between 0 and 4G")
+    return size
+
+def read_segments(infile, size: int):
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Yield (counter, last, data) for each size-byte piece of infile, counting from 1.
+    # Reads one piece ahead so the final piece can be flagged; a short piece is always
+    # the last. An empty input still gives one (empty) last piece.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    counter = 1
+    current = read_exact(infile, size)
+    while True:
+        following = read_exact(infile, size) if len(current) == size else b''
+        yield counter, not following, current
+        if not following:
+            return
+        current = following
+        counter += 1
+
+def process_segments(work, segments, jobs: int, write) -> int:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Run work(counter, last, data) over every segment and write() the results in order.
+
+    # With jobs > 1 segments are handled on a thread pool (AES-GCM and the NumPy
+    # interleave release the GIL). At most 2 x jobs segments are in flight, so memory
+    # stays bounded, and results are written strictly in segment order. An exception in
+    # any segment is raised when that segment's turn to be written comes.
+
+    # Returns: number of segments processed
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    count = 0
+    if jobs <= 1:
+        for segment in segments:
+            write(work(*segment))
+            count += 1
+        return count
+
+    pending = collections.deque()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        try:
+            for segment in segments:
+                if len(pending) >= 2 * jobs:
+                    write(pending.popleft().result())
+                pending.append(pool.submit(work, *segment))
+                count += 1
+            while pending:
+                write(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
+    return count
+
+def encode_stream(infile, outfile, password: str | MasterKeys, num_streams: int, pattern: str, noise_stream: int | None,
+                  chunk: int = DEFAULT_CHUNK, jobs: int = 1, debug: bool = False) -> tuple[int, int, int]:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Encode in constant memory using the segmented streaming container.
+
+    # Layout (every piece is split and interleaved on its own, then written in order):
+    # - preamble: salt (16) + file salt (16) + marker (8) + encrypted header (8 + 16 tag)
+    #   header = "PBN" + container version + segment size, nonce counter 0
+    # - segments: AES-GCM of each chunk plaintext bytes, nonce counter 1, 2, ...
+    #   with the last flag set on the final segment (which may be empty)
+
+    # Scrypt runs once (or not at all when a MasterKeys from an earlier file is passed
+    # as password); the segments are then encrypted on `jobs` threads.
+
+    # Returns: (plaintext bytes read, encrypted bytes, bytes written)
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    keys = password if isinstance(password, MasterKeys) else MasterKeys(password)
+    salt, master_key = keys.encoding_key()
+    file_salt = os.urandom(16)
+    aes = AESGCM(derive_file_key(master_key, file_salt))
+    header = struct.pack(HEADER_FORMAT, CONTAINER_MAGIC, CONTAINER_VERSION, chunk)
+    preamble = salt + file_salt + container_marker(salt, file_salt) + aes.encrypt(stream_nonce(0, False), header, salt + file_salt)
+    totals = [0, len(preamble), outfile.write(apply_pattern_and_noise(split_payload(preamble, num_streams), pattern, noise_stream)) or 0]
+
+    def work(counter, last, segment):
+        with PROFILE.phase("encrypt", len(segment)):
+            encrypted = aes.encrypt(stream_nonce(counter, last), segment, None)
+        shares = split_payload(encrypted, num_streams, debug=debug and counter == 1)
+        return len(segment), len(encrypted), apply_pattern_and_noise(shares, pattern, noise_stream, debug=debug and counter == 1)
+
+    def write(result):
+        totals[0] += result[0]
+        totals[1] += result[1]
+        with PROFILE.phase("write", len(result[2])):
+            totals[2] += outfile.write(result[2]) or 0
+
+    count = process_segments(work, read_segments(infile, chunk), jobs, write)
+
+    if debug:
+        print(f"[DEBUG] Streaming container: {count} segment(s) of up to {chunk} bytes, {max(jobs, 1)} job(s)")
+        print(f"[DEBUG] Plaintext read: {totals[0]} bytes, written: {totals[2]} bytes")
+    return totals[0], totals[1], totals[2]
+
+def decode_stream(infile, outfile, password: str | MasterKeys, num_streams: int, pattern: str, noise_stream: int | None,
+                  jobs: int = 1, debug: bool = False) -> tuple[int, bytes]:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Decode a streaming container in constant memory, verifying every segment before
+    # its plaintext is written. Segments are checked on `jobs` threads and written in order.
+
+    # The preamble is read and its marker checked first, before any key derivation. If
+    # it does not match, this is not a streaming container (or the settings are wrong)
+    # and (-1, prefix) is returned so the caller can fall back to the legacy format with
+    # the bytes already read. Either way a decode costs a single Scrypt run. A matching
+    # marker with a header that does not authenticate means a wrong password.
+
+    # Returns: (plaintext bytes written, b'') on success
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    prefix = read_exact(infile, interleave_size(PREAMBLE_LEN, num_streams, noise_stream))
+    try:
+        preamble = deinterleave_into(prefix, pattern, num_streams, noise_stream)[0].tobytes()
+    except ValueError:
+        return -1, prefix
+    salt, file_salt = preamble[:16], preamble[16:32]
+    if preamble[32:32 + MARKER_LEN] != container_marker(salt, file_salt):
+        return -1, prefix
+    keys = password if isinstance(password, MasterKeys) else MasterKeys(password)
+    aes = AESGCM(derive_file_key(keys.get(salt), file_salt))
+    try:
+        magic, version, chunk = struct.unpack(HEADER_FORMAT, aes.decrypt(stream_nonce(0, False), preamble[32 + MARKER_LEN:], salt + file_salt))
+    except InvalidTag:
+        raise ValueError("Streaming container header failed authentication — wrong password") from None
+    if magic != CONTAINER_MAGIC or version != CONTAINER_VERSION or chunk < 1:
+        raise ValueError(f"Unsupported streaming container (version {version})")
+
+    if debug:
+        print(f"[DEBUG] Streaming container v{version}, segment size {chunk} bytes")
+
+    def work(counter, last, block):
+        payload, lengths = deinterleave_into(block, pattern, num_streams, noise_stream, debug=debug and counter == 1)
+        try:
+            return aes_decrypt(aes, stream_nonce(counter, last), payload)
+        except InvalidTag:
+            raise ValueError(f"Segment {counter} failed authentication — corrupted, truncated or reordered") from None
+
+    total_out = [0]
+    def write(plain):
+        with PROFILE.phase("write", len(plain)):
+            outfile.write(plain)
+        total_out[0] += len(plain)
+
+    block = interleave_size(chunk + 16, num_streams, noise_stream)
+    count = process_segments(work, read_segments(infile, block), jobs, write)
+
+    if debug:
+        print(f"[DEBUG] Verified {count} segment(s), {total_out[0]} bytes written")
+    return total_out[0], b''
+
+def b85_encode(data: bytes) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Base85 (RFC 1924 alphabet, the same text as base64.b85encode) with NumPy.
+    # Every 4 bytes become 5 characters; a final n-byte group becomes n + 1 characters.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    whole = len(data) // 4 * 4
+    padded = bytes(data[whole:]) + bytes(-len(data) % 4)
+    words = np.frombuffer(bytes(data[:whole]) + padded, dtype='>u4').astype(np.uint32)
+    digits = np.empty((len(words), 5), dtype=np.uint8)
+    for i in range(4, -1, -1):
+        digits[:, i] = words % 85
+        words //= 85
+    text = B85_TABLE[digits].tobytes()
+    return text[:len(text) - (-len(data) % 4)]
+
+def b85_decode(text: bytes) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Reverse of b85_encode(). Raises ValueError on characters outside the alphabet.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if len(text) % 5 == 1:
+        raise ValueError("Base85 text has an invalid length")
+    pad = -len(text) % 5
+    values = B85_LOOKUP[np.frombuffer(bytes(text) + b'~' * pad, dtype=np.uint8)]
+    if (values == 255).any():
+        raise ValueError("Base85 text contains an invalid character")
+    words = np.zeros(len(values) // 5, dtype=np.uint64)
+    for column in values.reshape(-1, 5).T:
+        words = words * 85 + column
+    if (words >> 32).any():
+        raise ValueError("Base85 text contains an out-of-range group")
+    data = words.astype('>u4').tobytes()
+    return data[:len(data) - pad]
+
+def encode_text(data: bytes, text_format: str) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Binary → ASCII text in one of TEXT_FORMATS, no line breaks. base64 and base85 chunks
+    # must be whole groups (3 / 4 bytes) except at the very end.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if text_format == 'base64':
+        return binascii.b2a_base64(data, newline=False)
+    if text_format == 'base85':
+        return b85_encode(data)
+    return binascii.hexlify(data).translate(HEX_UPPER)
+
+def decode_text(text: bytes, text_format: str) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Text (whitespace already removed) → binary. Raises ValueError on invalid text.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if text_format == 'base64':
+        return binascii.a2b_base64(text)
+    if text_format == 'base85':
+        return b85_decode(text)
+    if len(text) % 2:
+        raise ValueError("Hex text has odd length — invalid")
+    return binascii.unhexlify(text)
+
+def detect_text_format(sample: bytes) -> str | None:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Guess the text format from the start of a file: the smallest alphabet that holds
+    # every character wins (hex ⊂ base64 ⊂ base85, near enough). Binary data always
+    # has bytes outside all of them, so it gives None.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if isinstance(sample, str):
+        sample = sample.encode('ascii', 'replace')
+    text = bytes(sample).translate(None, TEXT_WHITESPACE)
+    if not text:
+        return None
+    for text_format in TEXT_FORMATS:
+        if not text.translate(None, TEXT_ALPHABETS[text_format]):
+            return text_format
+    return None
+
+class TextWriter:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Write binary data to a text file as hex, base64 or base85 in lines of `width`,
+    # a piece at a time with binascii (NumPy for base85). Bytes that do not fill a
+    # whole base64/base85 group wait for the next write; call finish() at the end.
+    # Hex output is the same text bytes_to_hex_text() gives over the whole data.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    def __init__(self, f, text_format: str = 'hex', width: int = 80):
+        self.f = f
+        self.text_format = text_format
+        self.width = width
+        self.column = 0
+        self.carry = b''
+
+    def write(self, data: bytes) -> int:
+        size = len(data)
+        if self.carry:
+            data = self.carry + bytes(data)
+        keep = len(data) % TEXT_GROUPS[self.text_format]
+        self.carry = bytes(data[len(data) - keep:]) if keep else b''
+        self.emit(encode_text(data[:len(data) - keep], self.text_format))
+        return size
+
+    def finish(self):
+        if self.carry:
+            self.emit(encode_text(self.carry, self.text_format))
+            self.carry = b''
+
+    def emit(self, text: bytes):
+        # Fill the current line, then lay the rest out as rows of "\n" + `width` characters.
+        if not text:
+            return
+        head = text[:self.width - self.column]
+        body = np.frombuffer(text, dtype=np.uint8)[len(head):]
+        rows = len(body) // self.width
+        lines = np.empty((rows, self.width + 1), dtype=np.uint8)
+        lines[:, 0] = ord('\n')
+        lines[:, 1:] = body[:rows * self.width].reshape(rows, self.width)
+        tail = body[rows * self.width:].tobytes()
+        self.f.write((head + lines.tobytes() + (b'\n' + tail if tail else b'')).decode('ascii'))
+        if tail:
+            self.column = len(tail)
+        elif rows:
+            self.column = self.width
+        else:
+            self.column += len(head)
+
+class TextReader:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Read hex, base64 or base85 text (with or without spaces/newlines) as binary, a
+    # piece at a time. The format is detected from the start of the text unless given.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    def __init__(self, f, text_format: str | None = None):
+        self.f = f
+        self.text_format = text_format
+        self.pending = b''
+        self.buffer = bytearray()
+        self.eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self.eof and (size < 0 or len(self.buffer) < size):
+            raw = self.f.read(65536 if size < 0 else max(size * 2, 4096))
+            if isinstance(raw, str):
+                raw = raw.encode('ascii', 'replace')
+            self.eof = not raw
+            text = self.pending + raw.translate(None, TEXT_WHITESPACE)
+            if self.text_format is None and text:
+                self.text_format = detect_text_format(text) or 'hex'
+            group = TEXT_CHARS.get(self.text_format, 2)
+            usable = len(text) if self.eof else len(text) // group * group
+            self.buffer += decode_text(text[:usable], self.text_format or 'hex')
+            self.pending = text[usable:]
+        take = len(self.buffer) if size < 0 else min(size, len(self.buffer))
+        data = bytes(self.buffer[:take])
+        del self.buffer[:take]
+        return data
+
+def open_text_input(raw, text_format: str | None):
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Wrap a binary input in a TextReader when it holds text. With text_format None or
+    # 'auto' the first bytes are peeked at (nothing is consumed) to decide.
+    # Returns: (reader, text format or None for binary)
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if text_format in (None, 'auto'):
+        sample = raw.peek(4096)[:4096] if hasattr(raw, 'peek') else b''
+        detected = detect_text_format(sample)
+        if detected is None:
+            return (TextReader(raw) if text_format else raw), None
+        text_format = detected
+    return TextReader(raw, text_format), text_format
+
+def bytes_to_hex_text(data: bytes, width: int = 80) -> str:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Convert binary data to uppercase hex string with line wrapping.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    out = io.StringIO()
+    TextWriter(out, 'hex', width).write(data)
+    return out.getvalue()
+
+def hex_text_to_bytes(text: str) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Convert hex text (with or without spaces/newlines) back to bytes.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    return decode_text(text.encode('ascii').translate(None, TEXT_WHITESPACE), 'hex')
+
+def entropy_from_counts(counts) -> float:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Shannon entropy of a byte histogram (counts of each byte value).
+    # 0.0 = completely predictable, 8.0 = perfectly random.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = np.where(counts > 0, counts / total, 1.0)
+        return -(np.where(counts > 0, p * np.log2(p), 0.0)).sum(axis=-1)
+
+def calculate_entropy(data: bytes) -> float:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Calculate Shannon entropy of byte distribution.
+    # 0.0 = completely predictable, 8.0 = perfectly random.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if not data:
+        return 0.0
+    return float(entropy_from_counts(np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)))
+
+def chi_square_p(statistic: float, dof: int) -> float:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Upper-tail p-value of a chi-square statistic (Wilson-Hilferty normal approximation,
+    # accurate to a few digits at 255 degrees of freedom — no SciPy needed).
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    k = 2 / (9 * dof)
+    z = ((statistic / dof) ** (1 / 3) - (1 - k)) / math.sqrt(k)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+def analyze_stream(infile, num_streams: int, pattern: str, noise_k: int | None,
+                   window: int = ANALYZE_WINDOW, chunk: int = ANALYZE_CHUNK) -> dict:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Scan a file in chunks and return the forensic analysis report as a dict.
+
+    # Nothing but the current chunk is held in memory, so any size of file (or a pipe)
+    # can be scanned. Per 64 KiB sub-block of each chunk:
+    # - 256-bin histogram with np.bincount (entropy, chi-square, mean, top bytes)
+    # - sum of x[i] * x[i+1] for the serial correlation (carried across chunks)
+    # - histogram of every `window` bytes for the entropy profile
+    # Stream and noise lengths come from the file length alone (payload_length()),
+    # the file is never deinterleaved.
+
+    # Returns: report dict (see the JSON output of -analyze)
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    start = time.perf_counter()
+    step = window * max(1, ANALYZE_STEP // window)      # Sub-block: whole windows, cache sized
+    chunk = max(step, chunk // step * step)             # Windows never straddle chunks
+    counts = np.zeros(256, dtype=np.int64)
+    values = np.empty(step, dtype=np.float64)
+    lag_sum = 0
+    first = b''
+    previous = None
+    profile = []
+    size = 0
+
+    while True:
+        data = read_exact(infile, chunk)
+        if not data:
+            break
+        if not first:
+            first = data[:16]
+        chunk_bytes = np.frombuffer(data, dtype=np.uint8)
+
+        # Work through the chunk in cache-sized sub-blocks: that is several times faster
+        # than bincount / float conversion over the whole chunk at once.
+        for offset in range(0, len(chunk_bytes), step):
+            block = chunk_bytes[offset:offset + step]
+            rows = len(block) // window
+            if rows > 1:
+                # One histogram row per window: offset each window's bytes into its own 256 bins.
+                index = block[:rows * window].reshape(rows, window) + (np.arange(rows, dtype=np.int64) * 256)[:, None]
+                hist = np.bincount(index.ravel(), minlength=rows * 256).reshape(rows, 256)
+            else:
+                hist = np.bincount(block[:rows * window], minlength=256).reshape(1, 256)[:rows]
+            if rows:
+                profile.extend(entropy_from_counts(hist).tolist())
+                counts += hist.sum(axis=0)
+            if len(block) % window:
+                rest = np.bincount(block[rows * window:], minlength=256)
+                profile.append(float(entropy_from_counts(rest)))
+                counts += rest
+
+            x = values[:len(block)]
+            x[:] = block
+            lag_sum += int(np.dot(x[:-1], x[1:]))
+            if previous is not None:
+                lag_sum += previous * int(block[0])
+            previous = int(block[-1])
+
+        size += len(chunk_bytes)
+        if len(chunk_bytes) < chunk:
+            break
+
+    report = {
+        "tool": f"PyBinaryNoise {VERSION}",
+        "size": size,
+        "settings": {"streams": num_streams, "pattern": pattern, "noise": noise_k},
+        "first_bytes_hex": first.hex(),
+        "magic": next((name for magic, name in FILE_MAGIC if first.startswith(magic)), None),
+    }
+    if not size:
+        report["seconds"] = time.perf_counter() - start
+        return report
+
+    # Whole-file statistics from the histogram.
+    byte_values = np.arange(256, dtype=np.float64)
+    total = float(size)
+    sum_x = float((counts * byte_values).sum())
+    sum_x2 = float((counts * byte_values ** 2).sum())
+    expected = total / 256
+    chi2 = float(((counts - expected) ** 2 / expected).sum())
+
+    # Serial correlation as computed by `ent`: lag 1, wrapping the last byte to the first.
+    lag_sum += previous * first[0]
+    spread = total * sum_x2 - sum_x ** 2
+    serial = (total * lag_sum - sum_x ** 2) / spread if spread else 1.0
+
+    order = np.argsort(-counts, kind='stable')[:5]
+    report.update({
+        "entropy": float(entropy_from_counts(counts)),
+        "chi_square": {"statistic": chi2, "degrees_of_freedom": 255, "p_value": chi_square_p(chi2, 255)},
+        "serial_correlation": serial,
+        "mean": sum_x / total,
+        "unique_bytes": int((counts > 0).sum()),
+        "top_bytes": [[int(b), int(counts[b])] for b in order if counts[b]],
+        "null_bytes": int(counts[0]),
+        "ff_bytes": int(counts[0xff]),
+        "byte_0x42": int(counts[0x42]),
+        "even_bytes": int(counts[::2].sum()),
+        "histogram": counts.tolist(),
+    })
+
+    values = np.array(profile)
+    report["entropy_profile"] = {
+        "window": window,
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "mean": float(values.mean()),
+        "lowest_offset": int(values.argmin()) * window,
+        "values": [round(v, 4) for v in profile],
+    }
+
+    try:
+        parse_pattern(pattern, num_streams)
+        payload = payload_length(size, num_streams, noise_k)
+        report["streams"] = {
+            "lengths": [payload // num_streams + (1 if i < payload % num_streams else 0) for i in range(num_streams)],
+            "payload": payload,
+            "noise_bytes": size - payload,
+        }
+    except ValueError as e:
+        report["streams_error"] = str(e)
+
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+def analyze_file(report: dict, debug: bool = False):
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Print a dramatic, detailed (and mostly useless) forensic analysis report.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    size = report["size"]
+    print("\n" + "="*60)
+    print("          PYBINARYNOISE FORENSIC ANALYSIS REPORT")
+    print("="*60)
+    print(f"- File size: {size:,} bytes ({size/1024:.2f} KiB)")
+    if not size:
+        print("[WARN] Empty file — nothing to analyze.")
+        print("="*60 + "\n")
+        return
+
+    entropy = report["entropy"]
+    print(f"- Byte Entropy: {entropy:.4f} bits/byte")
+    print("-"*60)
+    if entropy > 7.9:
+        print("[####] ENTROPY LEVEL: EXTREME  — This file is basically pure chaos.")
+    elif entropy > 7.5:
+        print("[###_] ENTROPY LEVEL: HIGH     — Looks very random. Suspiciously random.")
+    elif entropy > 6.0:
+        print("[##__] ENTROPY LEVEL: MODERATE — Could be compressed or encrypted data.")
+    else:
+        print("[#___] ENTROPY LEVEL: LOW      — Probably plaintext or structured data.")
+
+    chi = report["chi_square"]
+    print(f"- Chi-square: {chi['statistic']:.2f} (255 dof, p = {chi['p_value']:.4f})")
+    print(f"- Serial correlation: {report['serial_correlation']:+.6f} (0.0 = uncorrelated)")
+    print(f"- Mean byte value: {report['mean']:.4f} (127.5 = random)")
+    profile = report["entropy_profile"]
+    print(f"- Entropy per {profile['window']:,} bytes: min {profile['min']:.4f} at offset {profile['lowest_offset']:,}, "
+          f"max {profile['max']:.4f}, mean {profile['mean']:.4f}")
+
+    most_common = [tuple(pair) for pair in report["top_bytes"]]
+    print(f"\n- Top 5 most common bytes:\n    {most_common}")
+    if report["null_bytes"] > size // 10:
+        print("[WARN] Excessive null bytes detected. Possible padding or corruption?")
+    if report["ff_bytes"] > size // 20:
+        print("[FFFF] Lots of 0xFF... are we looking at a flash dump or something?")
+
+    print("\n- First 16 bytes (hex):", report["first_bytes_hex"])
+    print(MAGIC_COMMENTS.get(report["magic"], "[OK__] No obvious file magic. Good obfuscation."))
+
+    settings = report["settings"]
+    print(f"\n- Configured streams: {settings['streams']}")
+    print(f"- Configured pattern: {settings['pattern']}")
+    print(f"- Noise insertion: {'After stream ' + str(settings['noise']) if settings['noise'] else 'Disabled'}")
+
+    if "streams" in report:
+        print("\n- Stream lengths (from the file length):")
+        for i, n in enumerate(report["streams"]["lengths"], 1):
+            print(f"  + Stream {i}: {n:5d} bytes  ({n/size*100:5.1f}%)")
+        if settings["noise"]:
+            noise_bytes = report["streams"]["noise_bytes"]
+            print(f"  + Noise  : ESTIMATED BYTES: {noise_bytes} ({noise_bytes/size*100:.1f}%)")
+    else:
+        print(f"\n[WARN] Streams could not be separated: {report['streams_error']}")
+
+    print("\n=== USELESS BUT IMPRESSIVE STATISTICS ===")
+    print(f"- Total unique bytes found: {report['unique_bytes']} of a possible 256 byte values.")
+    print(f"- Byte 0x00 appears {report['null_bytes']} times")
+    print(f"- Byte 0x42 appears {report['byte_0x42']} times (the answer to everything?)")
+    even = report["even_bytes"]
+    print(f"- Even bytes: {even} ({even/size*100:.1f}%) — slightly biased toward order?")
+
+    print("\n" + "="*60)
+    if entropy > 7.8 and settings["noise"]:
+        print("- VERDICT: This file is professionally deniable.")
+        print("       Even a nation-state would shrug and walk away.")
+    elif entropy > 7.0:
+        print("- VERDICT: Strong obfuscation detected.")
+        print("       Casual inspectors will give up immediately.")
+    else:
+        print("- VERDICT: Some structure visible.")
+        print("       Advanced analysis might reveal patterns.")
+    print("="*60 + "\n")
+
+    if debug:
+        print(f"[DEBUG] Scanned {size:,} bytes in {report['seconds']:.3f}s "
+              f"({size / max(report['seconds'], 1e-9) / 1e6:.0f} MB/s)")
+
+
+def batch_files(root: str, suffix: str = '', skip: str | None = None) -> list[str]:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Every regular file below root (recursive), as sorted paths relative to root.
+    # Only names ending in suffix are returned; the skip directory (the batch output
+    # when it sits inside the input) is not walked.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    skip = os.path.realpath(skip) if skip else None
+    found = []
+    for folder, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if os.path.realpath(os.path.join(folder, d)) != skip)
+        for name in files:
+            path = os.path.join(folder, name)
+            if name.endswith(suffix) and os.path.isfile(path):
+                found.append(os.path.relpath(path, root))
+    return sorted(found)
+
+def encode_file(in_path: str, out_path: str, keys: MasterKeys, num_streams: int, pattern: str,
+                noise_stream: int | None, chunk: int, text: str | None) -> dict:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Encode one file of a batch with the run's shared master key.
+    # Returns: manifest entry (sizes only, no key material)
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    with open(in_path, 'rb') as infile, open(out_path, 'w' if text else 'wb') as outfile:
+        writer = TextWriter(outfile, text) if text else outfile
+        size, payload_len, written = encode_stream(infile, writer, keys, num_streams, pattern, noise_stream, chunk)
+        if text:
+            writer.finish()
+    return {"size": size, "encoded_size": os.path.getsize(out_path)}
+
+def decode_file(in_path: str, out_path: str, keys: MasterKeys, num_streams: int, pattern: str,
+                noise_stream: int | None, text: str | None) -> dict:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Decode one file of a batch. Streaming containers reuse the cached master key for
+    # their salt; legacy files fall back to a Scrypt run of their own. A file that
+    # fails to decode leaves no output behind and the error is raised.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    try:
+        with open(in_path, 'rb') as f, open(out_path, 'wb') as outfile:
+            infile, text_format = open_text_input(f, text)
+            recovered, prefix = decode_stream(infile, outfile, keys, num_streams, pattern, noise_stream)
+            if recovered < 0:
+                interleaved = map_input(infile, prefix)
+                payload, lengths = deinterleave_into(interleaved, pattern, num_streams, noise_stream)
+                if hasattr(interleaved, 'close'):
+                    interleaved.close()
+                decrypted = decrypt_data(payload, keys.password)
+                outfile.write(decrypted)
+                recovered = len(decrypted)
+    except Exception:
+        if os.path.exists(out_path):
+            os.remove(out_path)
+        raise
+    return {"size": recovered, "encoded_size": os.path.getsize(in_path)}
+
+def run_batch(encode: bool, in_dir: str, out_dir: str, password: str, num_streams: int, pattern: str,
+              noise_stream: int | None, chunk: int, text: str | None, jobs: int, debug: bool = False) -> int:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Encode or decode every file below in_dir into the same tree below out_dir.
+
+    # - One password prompt and one Scrypt run for the whole batch (MasterKeys);
+    #   every file still gets its own file salt and HKDF subkey in its header
+    # - Files are processed on `jobs` threads, one file per thread
+    # - Encoding writes out_dir/manifest.json listing what was encoded
+
+    # Returns: number of files that failed
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    suffix = '.txt' if text else '.bin'
+    skip = out_dir if os.path.realpath(out_dir) != os.path.realpath(in_dir) else None
+    names = batch_files(in_dir, '' if encode else suffix, skip)
+    if encode:
+        names = [n for n in names if n != MANIFEST_NAME]
+    keys = MasterKeys(password)
+    if encode:
+        keys.encoding_key()              # The single Scrypt run, before the threads start
+
+    def work(name):
+        source = os.path.join(in_dir, name)
+        if encode:
+            target = name + suffix
+            entry = encode_file(source, os.path.join(out_dir, target), keys, num_streams, pattern, noise_stream, chunk, text)
+        else:
+            target = name[:-len(suffix)]
+            entry = decode_file(source, os.path.join(out_dir, target), keys, num_streams, pattern, noise_stream, text)
+        return {"path": name, "output": target, **entry}
+
+    start = time.time()
+    entries, failed = [], []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        futures = {pool.submit(work, name): name for name in names}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                entries.append(future.result())
+            except Exception as e:
+                failed.append({"path": futures[future], "error": str(e) or type(e).__name__})
+                print(f"[ERROR] {futures[future]}: {'decryption failed' if not encode else e}")
+            # Nothing has worked after several files: almost certainly the wrong password or
+            # settings, and each failed file would cost another Scrypt run, so stop here.
+            if not entries and len(failed) >= BATCH_GIVE_UP:
+                for pending in futures:
+                    pending.cancel()
+                break
+    elapsed = time.time() - start
+
+    entries.sort(key=lambda entry: entry["path"])
+    failed.sort(key=lambda entry: entry["path"])
+    if debug:
+        for entry in entries:
+            print(f"[DEBUG] {entry['path']} → {entry['output']} ({entry['size']} / {entry['encoded_size']} bytes)")
+        print(f"[DEBUG] Master keys derived (Scrypt): {len(keys.keys)}")
+
+    if encode:
+        manifest = {
+            "tool": f"PyBinaryNoise {VERSION}",
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "container_version": CONTAINER_VERSION,
+            "files": entries,
+            "failed": failed,
+            "total_size": sum(entry["size"] for entry in entries),
+            "total_encoded_size": sum(entry["encoded_size"] for entry in entries),
+        }
+        with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    action = "Encoded" if encode else "Decoded"
+    print(f"{action} {len(entries)} of {len(names)} files → {out_dir} in {elapsed:.2f}s "
+          f"({sum(entry['size'] for entry in entries)} bytes, {max(jobs, 1)} job(s))")
+    return len(failed)
+
+
+def canonical_pattern(pattern: str) -> str:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Shortest repeating unit of a pattern ("123123123" → "123"). A pattern and its
+    # repeats give exactly the same byte order, so recovery only tries each once.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    digits = ''.join(c for c in pattern if c.isdigit())
+    for size in range(1, len(digits) + 1):
+        if len(digits) % size == 0 and digits[:size] * (len(digits) // size) == digits:
+            return digits[:size]
+    return digits
+
+def recovery_patterns(max_streams: int) -> list[str]:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Candidate patterns for -recover, most likely first: for each stream count, the
+    # default pattern, then every order of the streams, then every mirrored order
+    # ("1234" → "12344321"). Each pattern names its stream count by its highest digit.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    found = []
+    for num_streams in range(1, max_streams + 1):
+        for order in itertools.permutations(''.join(str(i + 1) for i in range(num_streams))):
+            for pattern in (''.join(order), ''.join(order) + ''.join(reversed(order))):
+                pattern = canonical_pattern(pattern)
+                if pattern not in found:
+                    found.append(pattern)
+    return found
+
+def recovery_candidate(data, pattern: str, noise_stream: int | None) -> dict | None:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Read the salt (and, for the streaming container, the file salt and header) that a
+    # file would hold under one (pattern, noise) setting. Only the preamble bytes are
+    # deinterleaved for the streaming container; the legacy format needs the whole file
+    # because the streams' lengths depend on it.
+
+    # Returns: candidate dict, or None when the file length does not fit the setting
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    num_streams = max(int(c) for c in pattern)
+    candidate = {"streams": num_streams, "pattern": pattern, "noise": noise_stream}
+    size = interleave_size(PREAMBLE_LEN, num_streams, noise_stream)
+    if len(data) >= size:
+        try:
+            preamble = deinterleave_into(data[:size], pattern, num_streams, noise_stream)[0].tobytes()
+            if preamble[32:32 + MARKER_LEN] == container_marker(preamble[:16], preamble[16:32]):
+                candidate["stream"] = preamble
+                candidate["salt"] = preamble[:16]
+        except ValueError:
+            pass
+    try:
+        candidate["legacy_salt"] = legacy_salt(data, pattern, num_streams, noise_stream)
+    except ValueError:
+        pass
+    return candidate if "salt" in candidate or "legacy_salt" in candidate else None
+
+def legacy_salt(data, pattern: str, num_streams: int, noise_stream: int | None) -> bytes:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # The 16 salt bytes of a legacy (single-shot) file under one setting: the first 16
+    # bytes of stream 1. While they fall in the full pattern cycles their positions
+    # follow from the interleave columns, so the file is not deinterleaved.
+    # Raises ValueError if the file cannot hold a legacy payload under this setting.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    total = payload_length(len(data), num_streams, noise_stream)
+    if total < 44:
+        raise ValueError("Too short for a legacy payload")
+    lengths = [total // num_streams + (1 if i < total % num_streams else 0) for i in range(num_streams)]
+    pattern_list = parse_pattern(pattern, num_streams)
+    full, columns, width, tail_order, tail_streams = interleave_order(lengths, pattern_list, noise_stream)
+    stream_columns = [column for s, rank, column in columns if s == 0]
+    uses = len(stream_columns)
+    if full * uses < 16:
+        return deinterleave_into(data, pattern, num_streams, noise_stream)[0][:16].tobytes()
+    return bytes(data[(k // uses) * width + stream_columns[k % uses]] for k in range(16))
+
+def recovery_check(data, candidate: dict, keys: MasterKeys) -> dict | None:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # AES-GCM tag check of one candidate setting with a cached master key.
+    # The streaming container only needs the header tag; the legacy format needs the
+    # whole payload deinterleaved, so it is tried second.
+
+    # Returns: description of what authenticated, or None
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if "salt" in candidate:
+        preamble = candidate["stream"]
+        salt, file_salt = preamble[:16], preamble[16:32]
+        try:
+            aes = AESGCM(derive_file_key(keys.get(salt), file_salt))
+            magic, version, chunk = struct.unpack(HEADER_FORMAT, aes.decrypt(stream_nonce(0, False), preamble[32 + MARKER_LEN:], salt + file_salt))
+            if magic == CONTAINER_MAGIC:
+                return {"format": f"streaming container v{version}", "chunk": chunk}
+        except InvalidTag:
+            pass
+    if "legacy_salt" in candidate:
+        payload, lengths = deinterleave_into(data, candidate["pattern"], candidate["streams"], candidate["noise"])
+        try:
+            AESGCM(keys.get(candidate["legacy_salt"])).decrypt(bytes(payload[16:28]), memoryview(payload)[28:], None)
+            return {"format": "legacy single-shot"}
+        except InvalidTag:
+            pass
+    return None
+
+def recover_settings(data, password: str, patterns: list[str], noises: list[int | None], jobs: int,
+                     find_all: bool = False, debug: bool = False) -> dict:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Search for the -streams / -pattern / -noise setting a file was encoded with.
+
+    # 1. For every (pattern, noise) candidate, read out where its salt would be.
+    # 2. Group the candidates by salt: Scrypt runs once per distinct salt (MasterKeys
+    #    cache), however many settings share it.
+    # 3. Run the key derivations and AES-GCM tag checks on `jobs` threads, most likely
+    #    candidates first, and stop at the first setting that authenticates (unless
+    #    find_all is set).
+
+    # Returns: {"found": [...], "candidates": n, "salts": n, "seconds": t}
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    start = time.perf_counter()
+    keys = MasterKeys(password)
+    candidates = []
+    for pattern in patterns:
+        for noise_stream in noises:
+            if noise_stream is None or noise_stream <= max(int(c) for c in pattern):
+                candidate = recovery_candidate(data, pattern, noise_stream)
+                if candidate:
+                    candidates.append(candidate)
+
+    # Each distinct salt's key is derived once, by the first check that needs it.
+    groups = {}
+    for candidate in candidates:
+        for salt in (candidate.get("salt"), candidate.get("legacy_salt")):
+            if salt is not None:
+                groups.setdefault(salt, []).append(candidate)
+    if debug:
+        print(f"[DEBUG] {len(candidates)} candidate settings, {len(groups)} distinct salts")
+
+    found = []
+    def work(candidate):
+        result = recovery_check(data, candidate, keys)
+        if result:
+            result.update({"streams": candidate["streams"], "pattern": candidate["pattern"], "noise": candidate["noise"]})
+        return result
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        futures = [pool.submit(work, candidate) for candidate in candidates]
+        for future in futures:
+            result = future.result()
+            if result:
+                found.append(result)
+                if not find_all:
+                    for pending in futures:
+                        pending.cancel()
+                    break
+
+    return {"found": found, "candidates": len(candidates), "salts": len(groups),
+            "scrypt_runs": len(keys.keys), "seconds": time.perf_counter() - start}
+
+
+def bench_phase(fn, samples: int) -> tuple[float, int, object]:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Time one benchmark phase. A first, untimed run under tracemalloc measures the peak
+    # memory it allocates (NumPy buffers included); then `samples` timed runs.
+    # Returns: (median seconds, peak bytes, result of the first run)
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    times = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), peak, result
+
+def bench_row(phase: str, size: int | None, settings: tuple | None, seconds: float, peak: int, samples: int) -> dict:
+    streams, pattern, noise = settings or (None, None, None)
+    return {"phase": phase, "size": size, "streams": streams, "pattern": pattern, "noise": noise,
+            "samples": samples, "median_ms": seconds * 1000,
+            "mb_per_s": size / seconds / 1e6 if size and seconds else None, "peak_mb": peak / 1e6}
+
+def print_bench_row(row: dict):
+    speed = f"{row['mb_per_s']:10.1f}" if row["mb_per_s"] is not None else " " * 9 + "-"
+    print(f"{row['phase']:<13}{row['size'] if row['size'] is not None else '-':>11}{row['streams'] or '-':>8}"
+          f"{row['pattern'] or '-':>14}{row['noise'] if row['noise'] is not None else '-':>6}"
+          f"{row['median_ms']:12.3f}{speed}{row['peak_mb']:10.2f}")
+    sys.stdout.flush()
+
+def run_benchmark(sizes: list[int], stream_counts: list[int], pattern_lengths: list[int], noises: list[int],
+                  samples: int, tmpdir: str | None = None) -> list[dict]:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Time every phase of an encode and decode on random data of each size.
+
+    # - kdf: one Scrypt derive_key() (independent of size)
+    # - encrypt / decrypt: AES-GCM over the whole input
+    # - write / read: the encrypted payload to a temp file (flush + fsync) and back
+    # - split / interleave / deinterleave: for every streams x pattern length x noise
+    #   setting; a pattern of length L cycles through the streams (L >= streams),
+    #   noise 0 means no noise
+
+    # Returns: result rows (phase, size, settings, median ms, MB/s, peak MB)
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    rows = []
+    salt = os.urandom(16)
+    seconds, peak, key = bench_phase(lambda: derive_key("benchmark", salt), samples)
+    rows.append(bench_row("kdf", None, None, seconds, peak, samples))
+    print_bench_row(rows[-1])
+    aes = AESGCM(key)
+    nonce = os.urandom(12)
+
+    for size in sizes:
+        data = os.urandom(size)
+        seconds, peak, encrypted = bench_phase(lambda: aes.encrypt(nonce, data, None), samples)
+        rows.append(bench_row("encrypt", size, None, seconds, peak, samples))
+        print_bench_row(rows[-1])
+        seconds, peak, _ = bench_phase(lambda: aes.decrypt(nonce, encrypted, None), samples)
+        rows.append(bench_row("decrypt", size, None, seconds, peak, samples))
+        print_bench_row(rows[-1])
+
+        with tempfile.NamedTemporaryFile(dir=tmpdir, prefix="pbn-bench-") as f:
+            def write():
+                f.seek(0)
+                f.write(encrypted)
+                f.flush()
+                os.fsync(f.fileno())
+            def read():
+                f.seek(0)
+                return f.read()
+            for phase, fn in (("write", write), ("read", read)):
+                seconds, peak, _ = bench_phase(fn, samples)
+                rows.append(bench_row(phase, size, None, seconds, peak, samples))
+                print_bench_row(rows[-1])
+
+        for num_streams in stream_counts:
+            for length in pattern_lengths:
+                if length < num_streams:
+                    continue
+                pattern = ''.join(str(i % num_streams + 1) for i in range(length))
+                for noise in noises:
+                    noise_stream = noise or None
+                    settings = (num_streams, pattern, noise)
+                    seconds, peak, shares = bench_phase(lambda: split_payload(encrypted, num_streams), samples)
+                    rows.append(bench_row("split", size, settings, seconds, peak, samples))
+                    print_bench_row(rows[-1])
+                    seconds, peak, interleaved = bench_phase(lambda: apply_pattern_and_noise(shares, pattern, noise_stream), samples)
+                    rows.append(bench_row("interleave", size, settings, seconds, peak, samples))
+                    print_bench_row(rows[-1])
+                    seconds, peak, _ = bench_phase(lambda: deinterleave_into(interleaved, pattern, num_streams, noise_stream), samples)
+                    rows.append(bench_row("deinterleave", size, settings, seconds, peak, samples))
+                    print_bench_row(rows[-1])
+                    del shares, interleaved
+        del data, encrypted
+    return rows
+
+def compare_bench_baseline(rows: list[dict], baseline: dict, threshold: float) -> list[dict]:
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Compare median times against a saved -bench JSON run.
+    # Returns: the rows that got slower than the threshold
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    def key(row):
+        return row["phase"], row["size"], row["streams"], row["pattern"], row["noise"]
+    old = {key(row): row for row in baseline["results"]}
+    regressions = []
+    print(f"\nAgainst baseline ({baseline.get('created', 'unknown date')})")
+    print(f"{'Phase':<13}{'Size':>11}{'Streams':>8}{'Pattern':>14}{'Noise':>6}{'Base ms':>12}{'New ms':>12}{'Change':>9}")
+    print("-" * 85)
+    for row in rows:
+        if key(row) not in old or not old[key(row)]["median_ms"]:
+            continue
+        change = row["median_ms"] / old[key(row)]["median_ms"] - 1
+        if change > threshold:
+            regressions.append(row)
+        print(f"{row['phase']:<13}{row['size'] if row['size'] is not None else '-':>11}{row['streams'] or '-':>8}"
+              f"{row['pattern'] or '-':>14}{row['noise'] if row['noise'] is not None else '-':>6}"
+              f"{old[key(row)]['median_ms']:12.3f}{row['median_ms']:12.3f}{change * 100:+8.1f}%"
+              f"{'  SLOWER' if change > threshold else ''}")
+    return regressions
+
+
+# MAIN PROGRAM
+# -------------------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(
+        description=f"PyBinaryNoise v{VERSION} — Secure splitting + optional obfuscation"
+    )
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('-encode', action='store_true', help="Encode a file")
+    group.add_argument('-decode', action='store_true', help="Decode a file")
+    group.add_argument('-analyze', action='store_true', help="Forensic analysis mode — maximum useless detail")
+    group.add_argument('-recover', action='store_true', help="Find the -streams / -pattern / -noise setting of a file")
+    group.add_argument('-bench', action='store_true', help="Time each encode/decode phase on synthetic data")
+    parser.add_argument('-text', nargs='?', const='auto', choices=['auto'] + TEXT_FORMATS, metavar='FORMAT',
+                        help='Text output instead of binary: hex (default), base64 or base85; decode detects the format')
+    parser.add_argument('-infile', help='Input file (- for stdin)')
+    parser.add_argument('-outfile', '-o', help='Output file (encode/decode, - for stdout)')
+    parser.add_argument('-chunk', type=parse_size, default=DEFAULT_CHUNK, metavar='SIZE',
+                        help='Streaming segment size, e.g. 64K or 4M (default: 1M, 0 = legacy single-shot format)')
+    parser.add_argument('-jobs', '-j', type=int, default=1, metavar='N',
+                        help='Threads for segment encryption/decryption, or files at a time with -batch (default: 1, 0 = all cores)')
+    parser.add_argument('-batch', '-r', action='store_true',
+                        help='Encode/decode every file below the -infile directory into the -outfile directory')
+    parser.add_argument('-streams', '-s', type=int, default=DEFAULT_STREAMS, help=f'Number of streams (default: {DEFAULT_STREAMS})')
+    parser.add_argument('-pattern', '-pat', help='Interleave pattern, e.g. "123321"')
+    parser.add_argument('-noise', type=int, metavar='K', help='Insert random byte after every byte from stream K')
+    parser.add_argument('-json', metavar='FILE', help='Analyze / bench mode: write the report as JSON (- for stdout)')
+    parser.add_argument('-window', type=parse_size, default=ANALYZE_WINDOW, metavar='SIZE',
+                        help='Analyze mode: entropy profile window, 256 bytes or more, e.g. 4K (default: 64K)')
+    parser.add_argument('-max-streams', type=int, default=4, metavar='N',
+                        help='Recover mode: try stream counts 1 .. N (default: 4)')
+    parser.add_argument('-patterns', nargs='+', metavar='PATTERN',
+                        help='Recover mode: try only these patterns (stream count = highest digit)')
+    parser.add_argument('-all', action='store_true', help='Recover mode: keep going after the first match')
+    parser.add_argument('-bench-sizes', nargs='+', type=parse_size, default=[1 << 10, 64 << 10, 1 << 20, 16 << 20], metavar='SIZE',
+                        help='Bench mode: input sizes, e.g. 1K 1M 1G (default: 1K 64K 1M 16M)')
+    parser.add_argument('-bench-streams', nargs='+', type=int, default=[2, 3, 5], metavar='N',
+                        help='Bench mode: stream counts (default: 2 3 5)')
+    parser.add_argument('-bench-pattern-lengths', nargs='+', type=int, default=[6, 24], metavar='L',
+                        help='Bench mode: pattern lengths (default: 6 24)')
+    parser.add_argument('-bench-noise', nargs='+', type=int, default=[0, 1], metavar='K',
+                        help='Bench mode: noise streams, 0 = no noise (default: 0 1)')
+    parser.add_argument('-samples', type=int, default=5, help='Bench mode: timed runs per phase (default: 5)')
+    parser.add_argument('-baseline', metavar='FILE', help='Bench mode: compare against a JSON file from an earlier run')
+    parser.add_argument('-threshold', type=float, default=0.10,
+                        help='Bench mode: median slowdown counted as a regression (default: 0.10)')
+    parser.add_argument('-debug', '-d', action='store_true', help="Enable debug output")
+    parser.add_argument('-version', '-v', action='version', version=f'%(prog)s {VERSION}')
+
+    parser.add_argument('-profile', metavar='FILE',
+                        help='Time each phase (read, kdf, encrypt, split, interleave, write, ...) and write a Chrome trace JSON')
+    parser.add_argument('-cprofile', metavar='FILE', help='Also run cProfile around the run and save its stats to FILE')
+
+    args = parser.parse_args()
+    if not (args.profile or args.cprofile):
+        run(parser, args)
+        return
+
+    # PROFILING: phase spans and/or cProfile around the whole run, reported even if it exits
+    PROFILE.enable()
+    profiler = cProfile.Profile() if args.cprofile else None
+    wall, cpu = time.perf_counter(), time.process_time()
+    if profiler:
+        profiler.enable()
+    try:
+        run(parser, args)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        PROFILE.print_summary(wall, cpu)
+        if args.profile:
+            with open(args.profile, 'w') as f:
+                json.dump(PROFILE.chrome_trace(), f)
+            print(f"Phase trace → {args.profile} (open in chrome://tracing or ui.perfetto.dev)", file=sys.stderr)
+        if profiler:
+            print(f"cProfile stats → {args.cprofile}", file=sys.stderr)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(15)
+
+def run(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    # Carry out the mode chosen on the command line.
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    debug = args.debug
+
+    num_streams = args.streams
+    pattern = args.pattern or ''.join(str(i % num_streams + 1) for i in range(num_streams * 3))
+    noise_k = args.noise
+    jobs = args.jobs or os.cpu_count() or 1
+    text_format = 'hex' if args.text == 'auto' else args.text     # Format written on encode
+
+    # BENCH MODE
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if args.bench:
+        if args.json == '-':
+            sys.stdout = sys.stderr          # Table to stderr, JSON alone on stdout
+        print(f"{'Phase':<13}{'Size':>11}{'Streams':>8}{'Pattern':>14}{'Noise':>6}{'Median ms':>12}{'MB/s':>10}{'Peak MB':>10}")
+        print("-" * 84)
+        rows = run_benchmark(args.bench_sizes, args.bench_streams, args.bench_pattern_lengths, args.bench_noise,
+                             max(args.samples, 1))
+        output = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), "tool": f"PyBinaryNoise {VERSION}",
+                  "python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                  "cpus": os.cpu_count(), "results": rows}
+        if args.json == '-':
+            json.dump(output, sys.__stdout__, indent=2)
+            print(file=sys.__stdout__)
+        elif args.json:
+            with open(args.json, 'w') as f:
+                json.dump(output, f, indent=2)
+        if args.baseline:
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+            if compare_bench_baseline(rows, baseline, args.threshold):
+                sys.exit(1)
+        return
+
+    # ANALYZE MODE
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if args.analyze:
+        if args.batch:
+            parser.error("Analyze mode works on a single file")
+        if not args.infile:
+            parser.error("Analyze mode requires -infile")
+        if args.window < 256:
+            parser.error("-window must be at least 256 bytes")
+        raw = sys.stdin.buffer if args.infile == '-' else open(args.infile, 'rb')
+        infile = open_text_input(raw, args.text)[0] if args.text else raw
+        report = analyze_stream(infile, num_streams, pattern, noise_k, args.window)
+        report["file"] = args.infile
+        if args.infile != '-':
+            raw.close()
+
+        if args.json == '-':
+            json.dump(report, sys.stdout, indent=2)
+            print()
+            return
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2)
+        analyze_file(report, debug)
+        return
+
+    # RECOVER MODE
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if args.recover:
+        if not args.infile or args.infile == '-':
+            parser.error("Recover mode requires an -infile file")
+        patterns = [canonical_pattern(p) for p in args.patterns] if args.patterns else recovery_patterns(args.max_streams)
+        if not all(patterns):
+            parser.error("Invalid pattern — must contain digits")
+        noises = [args.noise] if args.noise else [None] + list(range(1, max(max(int(c) for c in p) for p in patterns) + 1))
+
+        if args.text:
+            with open(args.infile, 'rb') as f:
+                data = open_text_input(f, args.text)[0].read()
+        else:
+            with open(args.infile, 'rb') as f:
+                data = map_input(f, b'')
+        password = get_password("Enter your password: ")
+        result = recover_settings(data, password, patterns, noises, jobs, args.all, debug)
+        if hasattr(data, 'close'):
+            data.close()
+
+        print(f"Tried {result['candidates']} settings, {result['salts']} distinct salts, "
+              f"{result['scrypt_runs']} Scrypt runs in {result['seconds']:.2f}s")
+        if not result["found"]:
+            print("[ERROR] No setting authenticates — wrong password, or a pattern / stream count not tried")
+            sys.exit(1)
+        for match in result["found"]:
+            noise = f" -noise {match['noise']}" if match["noise"] else ""
+            chunk = f", segment size {match['chunk']} bytes" if "chunk" in match else ""
+            print(f"Recovered → -streams {match['streams']} -pattern {match['pattern']}{noise}  ({match['format']}{chunk})")
+        return
+
+    # BATCH MODE
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if args.batch:
+        if not args.infile or not args.outfile or '-' in (args.infile, args.outfile):
+            parser.error("Batch mode requires an -infile and an -outfile directory")
+        if not os.path.isdir(args.infile):
+            parser.error(f"Batch mode: {args.infile} is not a directory")
+        if args.encode and not args.chunk:
+            parser.error("Batch mode writes the streaming container (-chunk must not be 0)")
+        parse_pattern(pattern, num_streams)
+        password = get_password("Enter your password: ")
+        failed = run_batch(args.encode, args.infile, args.outfile, password, num_streams, pattern,
+                           noise_k, args.chunk, text_format if args.encode else args.text, jobs, debug)
+        if failed:
+            print(f"[ERROR] {failed} file(s) failed — wrong password, pattern, streams, or -noise setting")
+            sys.exit(1)
+        return
+
+    # Writing to stdout ("-outfile -"): keep the binary stream clean, messages go to stderr
+    out_stream = sys.stdout.buffer
+    if args.outfile == '-':
+        sys.stdout = sys.stderr
+
+    # ENCODE MODE
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    if args.encode:
+        if not args.infile or not args.outfile:
+            parser.error("Encode requires -infile and -outfile (use - for stdin/stdout)")
+        parse_pattern(pattern, num_streams)
+
+        infile = sys.stdin.buffer if args.infile == '-' else open(args.infile, 'rb')
+        password = get_password("Enter your password: ")
+
+        if args.outfile == '-':
+            out_name = "stdout"
+            outfile = io.TextIOWrapper(out_stream, encoding='ascii', write_through=True) if args.text else out_stream
+        elif args.text:
+            out_name = args.outfile if args.outfile.endswith('.txt') else args.outfile + '.txt'
+            outfile = open(out_name, 'w')
+        else:
+            out_name = args.outfile if args.outfile.endswith('.bin') else args.outfile + '.bin'
+            outfile = open(out_name, 'wb')
+        writer = TextWriter(outfile, text_format) if args.text else outfile
+
+        if args.chunk:
+            data_len, payload_len, written = encode_stream(infile, writer, password, num_streams, pattern, noise_k, args.chunk, jobs, debug)
+        else:
+            # Legacy single-shot container (PyBinaryNoise 2.4 and earlier)
+            with PROFILE.phase("read") as event:
+                data = infile.read()
+                if event:
+                    event["bytes"] = len(data)
+            encrypted = encrypt_data(data, password)
+
+            if debug:
+                print(f"[DEBUG] Original data len: {len(data)}")
+                print(f"[DEBUG] Encrypted payload len: {len(encrypted)}")
+
+            shares = split_payload(encrypted, num_streams, debug=debug)
+            interleaved = apply_pattern_and_noise(shares, pattern, noise_k, debug=debug)
+            with PROFILE.phase("write", len(interleaved)):
+                writer.write(interleaved)
+            payload_len, written = len(encrypted), len(interleaved)
+
+        if args.text:
+            writer.finish()
+        if infile is not sys.stdin.buffer:
+            infile.close()
+        if outfile is not out_stream:
+            outfile.close()
+
+        overhead_pct = ((written - payload_len) / payload_len * 100) if noise_k else 0
+        size_info = f" (+{overhead_pct:.1f}% overhead)" if noise_k else ""
+        print(f"Encoded → {out_name} ({written} bytes{size_info})")
+
+    # DECODE MODE
+    # ───────────────────────────────────────────────────────────────────────────────────────
+    elif args.decode:
+        if not args.infile:
+            parser.error("Decode requires -infile")
+        parse_pattern(pattern, num_streams)
+
+        # Text (hex / base64 / base85) is recognised from the first bytes, -text or not
+        infile, text_format = open_text_input(sys.stdin.buffer if args.infile == '-' else open(args.infile, 'rb'), args.text)
+        if debug and text_format:
+            print(f"[DEBUG] Reading {text_format} text input")
+
+        password = get_password("Enter your password: ")
+
+        if args.outfile == '-':
+            outfile = out_stream
+        elif args.outfile:
+            outfile = open(args.outfile, 'wb')
+        else:
+            outfile = open(os.devnull, 'wb')   # Verify only
+
+        try:
+            # Streaming container first; anything else is read as the legacy format.
+            recovered, prefix = decode_stream(infile, outfile, password, num_streams, pattern, noise_k, jobs, debug)
+            if recovered < 0:
+                if debug:
+                    print("[DEBUG] No streaming container header — trying the legacy format")
+                # Memory-mapped input, deinterleaved into one buffer and decrypted in place
+                interleaved = map_input(infile, prefix)
+                payload, lengths = deinterleave_into(interleaved, pattern, num_streams, noise_k, debug=debug)
+                if hasattr(interleaved, 'close'):
+                    interleaved.close()
+
+                if debug:
+                    print(f"[DEBUG] Expected payload length: {len(payload)}")
+
+                decrypted = decrypt_data(payload, password, debug)
+                with PROFILE.phase("write", len(decrypted)):
+                    outfile.write(decrypted)
+                recovered = len(decrypted)
+            outfile.close() if outfile is not out_stream else outfile.flush()
+
+            if args.outfile:
+                print(f"Decoded → {args.outfile}")
+            else:
+                print(f"Success! Recovered {recovered} bytes.")
+
+            if debug:
+                print(f"[DEBUG] Decryption successful — original file recovered.")
+
+        except Exception as e:
+            print("[ERROR] Decryption failed — wrong password, pattern, streams, or -noise setting")
+            if debug:
+                print(f"[DEBUG] Exception: {e}")
+                print("[DEBUG] Likely causes: wrong password, missing/incorrect -noise, wrong -pattern, or wrong -s")
+            # Do not leave a partly written output file behind
+            if outfile is not out_stream:
+                outfile.close()
+                if args.outfile:
+                    os.remove(args.outfile)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -10,18 +10,30 @@ import sys           # System-specific parameters and functions
 import hashlib       # Secure hashing algorithms (SHA, etc.)
 import random        # Pseudo-random number generation
 import math          # Mathematical functions and constants
+import os            # Bulk random bytes for noise carriers
+import tempfile      # Temporary output file next to the target WAV
 
 # Third-Party Libraries
+import numpy as np   # Vectorised sample generation and I/O
 from cryptography.hazmat.primitives.kdf.scrypt import Scrypt  # Password-based key derivation
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM  # Authenticated encryption (AES-GCM)
 
 VERSION = "2.0"
 SAMPLE_RATE = 44100
-SAMPLE_WIDTH = 2
-CHANNELS = 1
+SAMPLE_WIDTH = 2  # Bytes per sample of a generated carrier
+CHANNELS = 1  # Channels of a generated carrier
 HEADER_BITS = 32 + 128  # payload length (32 bits) + salt (128 bits)
-LSB_MASK = 0xFFFE
+LENGTH_BITS = 30  # Low bits of the length field hold the payload length, the top 2 hold depth - 1
+MAX_DEPTH = 4  # Most LSBs embedded per sample
 MAX_PAYLOAD_BITS = 500_000  # Reasonable upper limit
+NOISE_BLOCK = 1 << 20  # Samples generated / randomized per block
+WAV_FORMATS = (1, 0xFFFE)  # PCM and WAVE_FORMAT_EXTENSIBLE
+WAV_EXTENSIBLE = 0xFFFE
+PCM_SUBFORMAT = bytes.fromhex("0100000000001000800000aa00389b71")  # KSDATAFORMAT_SUBTYPE_PCM GUID
+WAV_WIDTHS = (2, 3, 4)  # 16, 24 and 32-bit samples
+FEISTEL_ROUNDS = 8  # Rounds of the index permutation
+SCATTER_OFFSETS = {b"header": 0, b"payload": HEADER_BITS}  # Start of each range in the permutation
+PINK_ROWS = 16  # Voss-McCartney octave rows (lowest row changes every 2**16 samples)
 
 # ------------------ Crypto ------------------
 def derive_key(password: str, salt: bytes) -> bytes:
@@ -60,86 +72,251 @@ def prng_indices(rng, total_samples, needed) -> list[int]:
     rng.shuffle(indices)
     return indices[:needed]
 
+def feistel_keys(password: str, context: bytes = b"index"):
+    digest = hashlib.sha512(password.encode() + context).digest()
+    return np.frombuffer(digest, dtype='<u8')[:FEISTEL_ROUNDS]
+
+def feistel_round(x, key):
+    # splitmix64 finalizer of the half block mixed with the round key
+    x = x ^ key
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def permuted_indices(password: str, total_samples: int, start: int, count: int, context: bytes = b"index"):
+    """Positions start .. start+count-1 of a keyed pseudorandom permutation of range(total_samples).
+
+    A balanced Feistel network permutes the smallest even-bit domain that holds every index,
+    and values that land outside range(total_samples) are walked through the network again
+    (cycle walking) until they land inside. Any slice of the permutation costs O(count)
+    time and memory, and different slices never share an index.
+    """
+    if start + count > total_samples:
+        raise ValueError("Not enough samples")
+    half = max(1, ((total_samples - 1).bit_length() + 1) // 2)
+    mask = np.uint64((1 << half) - 1)
+    keys = feistel_keys(password, context)
+
+    def encrypt(x):
+        left, right = x >> np.uint64(half), x & mask
+        for key in keys:
+            left, right = right, left ^ (feistel_round(right, key) & mask)
+        return (left << np.uint64(half)) | right
+
+    indices = encrypt(np.arange(start, start + count, dtype=np.uint64))
+    outside = np.flatnonzero(indices >= total_samples)
+    while len(outside):
+        indices[outside] = encrypt(indices[outside])
+        outside = outside[indices[outside] >= total_samples]
+    return indices.astype(np.intp)
+
+def scattered_indices(password: str, total_samples: int, count: int, context: bytes, legacy=False):
+    # Header and payload are disjoint ranges of one permutation, so they can never collide.
+    # legacy=True gives the shuffled positions written by earlier versions.
+    if legacy:
+        return prng_indices(prng_from_password(password, context), total_samples, count)
+    return permuted_indices(password, total_samples, SCATTER_OFFSETS[context], count)
+
 # ------------------ Audio ------------------
-def generate_white_noise(num_samples: int):
-    return [secrets.randbelow(65536) for _ in range(num_samples)]
+def random_int16(count: int):
+    return np.frombuffer(os.urandom(2 * count), dtype=np.int16)
+
+def generate_white_noise(num_samples: int, width: int = SAMPLE_WIDTH):
+    """Uniform white noise from one bulk os.urandom buffer, as (num_samples, width) sample bytes."""
+    return np.frombuffer(bytearray(os.urandom(width * num_samples)), dtype=np.uint8).reshape(num_samples, width)
+
+def pink_noise_blocks(num_samples: int, block: int = NOISE_BLOCK):
+    """Voss-McCartney pink noise, yielded as int16 blocks.
+
+    Row k holds a random value that is redrawn every 2**(k+1) samples, offset by 2**k,
+    so at most one row changes per sample. Summing the rows plus a white row gives a
+    -3 dB/octave spectrum. Each row keeps its held value across blocks, so the blocks
+    join into one continuous signal.
+    """
+    held = random_int16(PINK_ROWS).astype(np.int32)
+    last = np.zeros(PINK_ROWS, dtype=np.int64)
+    # Sum of PINK_ROWS + 1 uniform int16 values, scaled so +/-4 standard deviations fill int16.
+    scale = 32767 / (4 * 18918 * math.sqrt(PINK_ROWS + 1))
+    for start in range(0, num_samples, block):
+        index = np.arange(start, min(start + block, num_samples), dtype=np.int64)
+        total = random_int16(len(index)).astype(np.int32)
+        for k in range(PINK_ROWS):
+            updates = (index + (1 << k)) >> (k + 1)
+            values = np.empty(int(updates[-1] - last[k]) + 1, dtype=np.int32)
+            values[0] = held[k]
+            values[1:] = random_int16(len(values) - 1)
+            total += values[updates - last[k]]
+            held[k] = values[-1]
+            last[k] = updates[-1]
+        yield np.clip(np.rint(total * scale), -32768, 32767).astype(np.int16)
 
 def generate_pink_noise(num_samples: int):
-    """Simple pink noise approximation using cumulative sum."""
-    white = [secrets.randbelow(65536) - 32768 for _ in range(num_samples)]
-    pink = [0] * num_samples
-    pink[0] = white[0]
-    for i in range(1, num_samples):
-        pink[i] = pink[i-1] + white[i] / math.sqrt(i)
-    # Normalize to 0-65535
-    min_val = min(pink)
-    max_val = max(pink)
-    if max_val == min_val:
-        return [32768] * num_samples
-    scale = 65535 / (max_val - min_val)
-    return [int((v - min_val) * scale) for v in pink]
-
-def write_wav(filename, samples):
-    with wave.open(filename, 'wb') as wf:
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(SAMPLE_WIDTH)
-        wf.setframerate(SAMPLE_RATE)
-        data = b''.join(struct.pack('<h', s - 32768) for s in samples)
-        wf.writeframes(data)
-
-def read_wav(filename):
-    with wave.open(filename, 'rb') as wf:
-        if wf.getnframes() < HEADER_BITS:
+    """Vectorised Voss-McCartney pink noise (int16)."""
+    samples = np.empty(num_samples, dtype=np.int16)
+    start = 0
+    for chunk in pink_noise_blocks(num_samples):
+        samples[start:start + len(chunk)] = chunk
+        start += len(chunk)
+    return samples
+
+def generate_carrier(num_samples: int, noise_type="white", width=SAMPLE_WIDTH, channels=CHANNELS):
+    """Generated noise carrier as little-endian sample bytes, shape (num_samples, width).
+
+    Pink noise is made per channel and interleaved, so every channel has its own -3 dB/octave
+    signal. 24 and 32-bit samples carry the 16-bit pink noise in their top two bytes over
+    random low bytes.
+    """
+    if noise_type != "pink":
+        return generate_white_noise(num_samples, width)
+    pink = np.empty((num_samples // channels, channels), dtype='<i2')
+    for channel in range(channels):
+        pink[:, channel] = generate_pink_noise(len(pink))
+    carrier = generate_white_noise(num_samples, width)
+    carrier[:, width - 2:] = pink.reshape(-1, 1).view(np.uint8)
+    return carrier
+
+def wav_layout(f):
+    """Walks the RIFF chunks of an open WAV file.
+
+    Returns (channels, sample_width, sample_rate, data_offset, frames). The frame count is
+    taken from the data chunk size, capped at what is actually in the file.
+    """
+    riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+    if riff != b'RIFF' or wave_id != b'WAVE':
+        raise ValueError("Not a RIFF/WAVE file")
+    fmt = None
+    subformat = None
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            raise ValueError("WAV has no data chunk")
+        chunk_id, size = struct.unpack('<4sI', chunk)
+        if chunk_id == b'fmt ':
+            body = f.read(size)
+            if len(body) < 16:
+                raise ValueError("WAV fmt chunk is truncated")
+            fmt = struct.unpack('<HHIIHH', body[:16])
+            if len(body) >= 40:
+                subformat = body[24:40]
+            f.seek(size & 1, 1)
+        elif chunk_id == b'data':
+            break
+        else:
+            f.seek(size + (size & 1), 1)
+    if fmt is None:
+        raise ValueError("WAV has no fmt chunk")
+    tag, channels, rate, _, block_align, bits = fmt
+    width = bits // 8
+    # Extensible WAVs name the real sample format in the SubFormat GUID (it may be float)
+    if tag == WAV_EXTENSIBLE and subformat != PCM_SUBFORMAT:
+        tag = None
+    if tag not in WAV_FORMATS or bits % 8 or width not in WAV_WIDTHS or block_align != channels * width:
+        raise ValueError("Only 16, 24 and 32-bit PCM WAVs are supported")
+    offset = f.tell()
+    available = os.fstat(f.fileno()).st_size - offset
+    return channels, width, rate, offset, min(size, available) // block_align
+
+def write_wav(filename, carrier, channels=CHANNELS, rate=SAMPLE_RATE):
+    """Writes (samples, width) sample bytes straight from the array buffer.
+
+    The WAV is written to a temporary file in the same directory and then moved over
+    filename, so a carrier memory-mapped from filename itself is never truncated while
+    it is still being read.
+    """
+    fd, temp = tempfile.mkstemp(suffix=".wav", dir=os.path.dirname(os.path.abspath(filename)))
+    try:
+        with os.fdopen(fd, 'wb') as f, wave.open(f, 'wb') as wf:
+            wf.setnchannels(channels)
+            wf.setsampwidth(carrier.shape[1])
+            wf.setframerate(rate)
+            wf.writeframes(memoryview(np.ascontiguousarray(carrier)).cast('B'))
+        # mkstemp files are owner-only; keep the mode a plain open() would give
+        if os.path.exists(filename):
+            mode = os.stat(filename).st_mode & 0o7777
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(temp, mode)
+        os.replace(temp, filename)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+def read_wav(filename, mmap=False, writable=True):
+    """Reads a WAV as (carrier, channels, sample_rate).
+
+    The carrier is the interleaved little-endian sample bytes, shape (frames * channels, width),
+    so column 0 is the least significant byte of every sample whatever the bit depth. The data
+    chunk is read straight into the array with readinto. With mmap=True the file is
+    memory-mapped instead, so only the pages that are touched are read; writable maps are
+    copy-on-write and never change the file on disk.
+    """
+    with open(filename, 'rb') as f:
+        channels, width, rate, offset, frames = wav_layout(f)
+        if frames * channels < HEADER_BITS:
             raise ValueError("WAV too short for header")
-        frames = wf.readframes(wf.getnframes())
-        signed = struct.unpack('<' + 'h' * wf.getnframes(), frames)
-        samples = [s + 32768 for s in signed]
-        return samples
+        shape = (frames * channels, width)
+        if mmap:
+            return np.memmap(f, dtype=np.uint8, mode='c' if writable else 'r', offset=offset, shape=shape), channels, rate
+        carrier = np.empty(shape, dtype=np.uint8)
+        f.seek(offset)
+        f.readinto(memoryview(carrier).cast('B'))
+        return carrier, channels, rate
 
 # ------------------ Bit helpers ------------------
 def bits_from_bytes(data: bytes):
-    for byte in data:
-        for i in range(7, -1, -1):
-            yield (byte >> i) & 1
-
-def bytes_from_bits(bits):
-    out = bytearray()
-    byte = 0
-    count = 0
-    for bit in bits:
-        byte = (byte << 1) | bit
-        count += 1
-        if count == 8:
-            out.append(byte)
-            byte = 0
-            count = 0
-    if count > 0:
-        byte <<= (8 - count)
-        out.append(byte)
-    return bytes(out)
+    """MSB-first bit array (uint8 0/1) of the data."""
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+def bytes_from_bits(bits) -> bytes:
+    """Packs MSB-first bits back into bytes, zero padding a final partial byte."""
+    return np.packbits(np.asarray(bits, dtype=np.uint8)).tobytes()
+
+def lsb_mask(depth: int):
+    # Keeps everything but the low depth bits of a sample's least significant byte
+    return np.uint8((0xFF << depth) & 0xFF)
+
+def pack_slots(bits, depth: int = 1):
+    """Groups bits MSB-first into depth-bit values, one per sample. A final partial group is padded with random bits."""
+    slots = -(-len(bits) // depth)
+    if slots * depth != len(bits):
+        bits = np.concatenate((bits, bits_from_bytes(os.urandom(depth))[:slots * depth - len(bits)]))
+    shifts = np.arange(depth - 1, -1, -1, dtype=np.uint8)
+    return (bits.reshape(slots, depth) << shifts).sum(axis=1, dtype=np.uint8)
+
+def unpack_slots(values, count: int, depth: int = 1):
+    """The first count bits held in the low depth bits of each sample byte."""
+    shifts = np.arange(depth - 1, -1, -1, dtype=np.uint8)
+    return ((values[:, None] >> shifts) & 1).astype(np.uint8).ravel()[:count]
+
+# All embedding works on the least significant byte of every sample (column 0 of the carrier),
+# so 16, 24 and 32-bit carriers and memory-mapped files share one code path. Interleaved
+# channels follow each other in the sample order, so consecutive slots cycle through the channels.
 
 # Scattered embedding/extraction (used in stealth mode)
-def embed_bits_scattered(samples, bits, password, context=b"payload"):
-    rng = prng_from_password(password, context)
-    indices = prng_indices(rng, len(samples), len(bits))
-    for bit, idx in zip(bits, indices):
-        samples[idx] = (samples[idx] & LSB_MASK) | bit
+def embed_bits_scattered(samples, bits, password, context=b"payload", depth=1):
+    values = pack_slots(bits, depth)
+    indices = scattered_indices(password, len(samples), len(values), context)
+    samples[indices] = (samples[indices] & lsb_mask(depth)) | values
+    return indices
 
-def extract_bits_scattered(samples, count, password, context=b"payload"):
-    rng = prng_from_password(password, context)
-    indices = prng_indices(rng, len(samples), count)
-    return [samples[idx] & 1 for idx in indices]
+def extract_bits_scattered(samples, count, password, context=b"payload", legacy=False, depth=1):
+    indices = scattered_indices(password, len(samples), -(-count // depth), context, legacy)
+    return unpack_slots(samples[indices], count, depth)
 
 # Sequential embedding/extraction (kept for non-stealth mode and legacy analysis)
-def embed_bits_sequential(samples, bits, start_idx=0):
-    for i, bit in enumerate(bits):
-        idx = start_idx + i
-        if idx >= len(samples):
-            raise ValueError("Not enough samples")
-        samples[idx] = (samples[idx] & LSB_MASK) | bit
+def embed_bits_sequential(samples, bits, start_idx=0, depth=1):
+    values = pack_slots(bits, depth)
+    if start_idx + len(values) > len(samples):
+        raise ValueError("Not enough samples")
+    block = samples[start_idx:start_idx + len(values)]
+    block &= lsb_mask(depth)
+    block |= values
+    return np.arange(start_idx, start_idx + len(values))
 
-def extract_bits_sequential(samples, count, start_idx=0):
-    return [samples[start_idx + i] & 1 for i in range(min(count, len(samples) - start_idx))]
+def extract_bits_sequential(samples, count, start_idx=0, depth=1):
+    return unpack_slots(samples[start_idx:start_idx + -(-count // depth)], count, depth)
 
 # Header encryption
 def encrypt_header(header_bytes: bytes, password: str) -> bytes:
@@ -151,93 +328,110 @@ def decrypt_header(encrypted_header: bytes, password: str) -> bytes:
     return encrypt_header(encrypted_header, password)  # XOR is its own inverse
 
 # Post-embedding LSB randomization
-def randomize_unused_lsbs(samples, password, used_indices_header, used_indices_payload):
-    used = set(used_indices_header + used_indices_payload)
+def lsb_noise_bits(rng, count: int, spare):
+    """The next count values of rng.randint(0, 1), drawn in bulk.
+
+    randint(0, 1) takes one 32-bit Mersenne Twister word, keeps its top two bits and
+    rejects them when they are 2 or 3. So the value is bit 30 of every word whose top
+    bit is clear. Filtering one large getrandbits() draw the same way gives the same
+    bit stream as calling randint per sample. Bits drawn beyond count are returned as
+    the new spare and used first on the next call.
+    """
+    parts = [spare]
+    have = len(spare)
+    while have < count:
+        words = 2 * (count - have) + 64
+        draw = np.frombuffer(rng.getrandbits(32 * words).to_bytes(4 * words, "little"), dtype='<u4')
+        parts.append((draw[draw < 0x80000000] >> 30).astype(np.uint8))
+        have += len(parts[-1])
+    bits = np.concatenate(parts)
+    return bits[:count], bits[count:]
+
+def randomize_unused_lsbs(samples, password, used_indices_header, used_indices_payload, depth=1):
+    unused = np.ones(len(samples), dtype=bool)
+    unused[used_indices_header] = False
+    unused[used_indices_payload] = False
     rng = prng_from_password(password, b"lsb_noise")
-    for i in range(len(samples)):
-        if i not in used:
-            samples[i] = (samples[i] & LSB_MASK) | rng.randint(0, 1)
+    spare = np.empty(0, dtype=np.uint8)
+    for start in range(0, len(samples), NOISE_BLOCK):
+        block = samples[start:start + NOISE_BLOCK]
+        mask = unused[start:start + NOISE_BLOCK]
+        bits, spare = lsb_noise_bits(rng, depth * int(np.count_nonzero(mask)), spare)
+        block[mask] = (block[mask] & lsb_mask(depth)) | pack_slots(bits, depth)
 
 # ------------------ Core operations ------------------
-def encode_data(data: bytes, wavfile: str, stealth=False, noise_type="white", input_wav=None):
+def encode_data(data: bytes, wavfile: str, stealth=False, noise_type="white", input_wav=None, mmap=False,
+                depth=1, channels=CHANNELS, width=SAMPLE_WIDTH):
     password = getpass.getpass("Password: ")
     salt, encrypted = encrypt_message(data, password)
-    payload_bits = list(bits_from_bytes(encrypted))
-    length_bytes = len(payload_bits).to_bytes(4, "big")
+    payload_bits = bits_from_bytes(encrypted)
+    if len(payload_bits) >> LENGTH_BITS:
+        raise ValueError("Payload too large")
+    length_bytes = ((depth - 1) << LENGTH_BITS | len(payload_bits)).to_bytes(4, "big")
     header_bytes = length_bytes + salt
     encrypted_header_bytes = encrypt_header(header_bytes, password)
-    header_bits = list(bits_from_bytes(encrypted_header_bytes))
+    header_bits = bits_from_bytes(encrypted_header_bytes)
 
-    total_bits_needed = HEADER_BITS + len(payload_bits)
-    total_samples = max(total_bits_needed + 10000, 600000)  # Padding
+    # The header is always 1 bit per sample, the payload depth bits per sample.
+    samples_needed = HEADER_BITS + -(-len(payload_bits) // depth)
+    total_bits = max(HEADER_BITS + len(payload_bits) + 10000, 600000)  # Padding
+    total_frames = -(-total_bits // (depth * channels))
 
     if input_wav:
-        samples = read_wav(input_wav)
-        if len(samples) < total_bits_needed + 2000:
+        carrier, channels, rate = read_wav(input_wav, mmap=mmap)
+        if len(carrier) < samples_needed + 2000:
             raise ValueError("Input WAV too short for payload")
     else:
-        samples = generate_pink_noise(total_samples) if noise_type == "pink" else generate_white_noise(total_samples)
-
-    used_header = []
-    used_payload = []
+        carrier, rate = generate_carrier(total_frames * channels, noise_type, width, channels), SAMPLE_RATE
+    samples = carrier[:, 0]
 
     # Embed header
     if stealth:
-        rng_header = prng_from_password(password, b"header")
-        header_indices = prng_indices(rng_header, len(samples), HEADER_BITS)
-        used_header = header_indices
-        for bit, idx in zip(header_bits, header_indices):
-            samples[idx] = (samples[idx] & LSB_MASK) | bit
+        used_header = embed_bits_scattered(samples, header_bits, password, context=b"header")
     else:
-        embed_bits_sequential(samples, header_bits, start_idx=0)
-        used_header = list(range(HEADER_BITS))
+        used_header = embed_bits_sequential(samples, header_bits, start_idx=0)
 
     # Embed payload
     if stealth:
-        rng_payload = prng_from_password(password, b"payload")
-        payload_indices = prng_indices(rng_payload, len(samples), len(payload_bits))
-        # Simple collision avoidance
-        attempts = 0
-        while set(payload_indices) & set(used_header) and attempts < 100:
-            payload_indices = prng_indices(rng_payload, len(samples), len(payload_bits))
-            attempts += 1
-        used_payload = payload_indices
-        for bit, idx in zip(payload_bits, payload_indices):
-            samples[idx] = (samples[idx] & LSB_MASK) | bit
+        used_payload = embed_bits_scattered(samples, payload_bits, password, context=b"payload", depth=depth)
     else:
-        embed_bits_sequential(samples, payload_bits, start_idx=HEADER_BITS)
-        used_payload = list(range(HEADER_BITS, HEADER_BITS + len(payload_bits)))
+        used_payload = embed_bits_sequential(samples, payload_bits, start_idx=HEADER_BITS, depth=depth)
 
     # Randomize unused LSBs
-    randomize_unused_lsbs(samples, password, used_header, used_payload)
+    randomize_unused_lsbs(samples, password, used_header, used_payload, depth)
 
-    write_wav(wavfile, samples)
+    write_wav(wavfile, carrier, channels, rate)
     print(f"[+] Wrote {wavfile}")
 
-def decode_data(wavfile: str, stealth=False):
-    samples = read_wav(wavfile)
+def split_length_field(field: int):
+    # Returns (payload length in bits, depth). Files from before multi-bit depth have the top bits clear.
+    return field & ((1 << LENGTH_BITS) - 1), (field >> LENGTH_BITS) + 1
+
+def decode_data(wavfile: str, stealth=False, mmap=False, legacy=False):
+    carrier, channels, rate = read_wav(wavfile, mmap=mmap, writable=False)
+    samples = carrier[:, 0]
     password = getpass.getpass("Password: ")
 
     # Extract header
     if stealth:
-        header_bits = extract_bits_scattered(samples, HEADER_BITS, password, context=b"header")
+        header_bits = extract_bits_scattered(samples, HEADER_BITS, password, context=b"header", legacy=legacy)
     else:
         header_bits = extract_bits_sequential(samples, HEADER_BITS, start_idx=0)
 
     encrypted_header = bytes_from_bits(header_bits)
     header_bytes = decrypt_header(encrypted_header, password)
-    length = int.from_bytes(header_bytes[:4], "big")
+    length, depth = split_length_field(int.from_bytes(header_bytes[:4], "big"))
     salt = header_bytes[4:]
 
-    if length <= 0 or length > len(samples):
+    if length <= 0 or -(-length // depth) > len(samples) - HEADER_BITS or (legacy and depth > 1):
         print("[-] Invalid or implausible payload length")
         return
 
     # Extract payload
     if stealth:
-        payload_bits = extract_bits_scattered(samples, length, password, context=b"payload")
+        payload_bits = extract_bits_scattered(samples, length, password, context=b"payload", legacy=legacy, depth=depth)
     else:
-        payload_bits = extract_bits_sequential(samples, length, start_idx=HEADER_BITS)
+        payload_bits = extract_bits_sequential(samples, length, start_idx=HEADER_BITS, depth=depth)
 
     payload = bytes_from_bits(payload_bits)
     try:
@@ -262,9 +456,10 @@ def shannon_entropy(data: bytes) -> float:
             entropy -= p * math.log2(p)
     return entropy
 
-def analyze_wav(wavfile: str):
+def analyze_wav(wavfile: str, mmap=False):
     try:
-        samples = read_wav(wavfile)
+        carrier, channels, rate = read_wav(wavfile, mmap=mmap, writable=False)
+        samples = carrier[:, 0]
         total_samples = len(samples)
         if total_samples < HEADER_BITS:
             print("[*] WAV file too short even for header.")
@@ -274,9 +469,10 @@ def analyze_wav(wavfile: str):
         return
 
     print("[*] PyWhiteNoise Analysis")
+    print(f" Format : {channels} ch, {8 * carrier.shape[1]}-bit, {rate:,} Hz")
     print(f" Total samples : {total_samples:,}")
-    print(f" Theoretical max payload bits : {total_samples:,}")
-    print(f" Theoretical max payload bytes : {total_samples // 8:,}")
+    print(f" Theoretical max payload bits : {total_samples:,} (depth 1), {total_samples * MAX_DEPTH:,} (depth {MAX_DEPTH})")
+    print(f" Theoretical max payload bytes : {total_samples // 8:,} (depth 1), {total_samples * MAX_DEPTH // 8:,} (depth {MAX_DEPTH})")
     print()
     print(" Note: In stealth mode (-stealth):")
     print("   • Header is encrypted and scattered (unknown positions)")
@@ -289,14 +485,15 @@ def analyze_wav(wavfile: str):
 
     # Candidate 1: Legacy sequential (non-stealth)
     header_bits_seq = extract_bits_sequential(samples, HEADER_BITS, start_idx=0)
-    length_seq = int.from_bytes(bytes_from_bits(header_bits_seq[:32]), "big")
+    length_seq, depth_seq = split_length_field(int.from_bytes(bytes_from_bits(header_bits_seq[:32]), "big"))
     salt_seq = bytes_from_bits(header_bits_seq[32:])
     entropy_seq = shannon_entropy(salt_seq)
-    plausible_seq = (0 < length_seq <= total_samples - HEADER_BITS)
+    plausible_seq = (0 < -(-length_seq // depth_seq) <= total_samples - HEADER_BITS)
     confidence_seq = "High (legacy)" if plausible_seq and entropy_seq > 7.9 else "Medium" if plausible_seq else "Low"
     candidates.append({
         "mode": "Legacy sequential (non-stealth)",
         "length_bits": length_seq,
+        "depth": depth_seq,
         "salt_entropy": entropy_seq,
         "plausible": plausible_seq,
         "confidence": confidence_seq
@@ -306,12 +503,13 @@ def analyze_wav(wavfile: str):
     try:
         header_bits_guess = extract_bits_scattered(samples, HEADER_BITS, "dummy", context=b"header")
         encrypted_header = bytes_from_bits(header_bits_guess)
-        length_guess_raw = int.from_bytes(encrypted_header[:4], "big")
-        plausible_guess = (0 < length_guess_raw < total_samples)
+        length_guess_raw, depth_guess = split_length_field(int.from_bytes(encrypted_header[:4], "big"))
+        plausible_guess = (0 < -(-length_guess_raw // depth_guess) < total_samples)
         confidence_guess = "Very Low (guessed context, header encrypted)" if plausible_guess else "None"
         candidates.append({
             "mode": "Guessed stealth context (unlikely)",
             "length_bits": length_guess_raw,
+            "depth": depth_guess,
             "salt_entropy": "N/A",
             "plausible": plausible_guess,
             "confidence": confidence_guess
@@ -331,7 +529,7 @@ def analyze_wav(wavfile: str):
     print(f" Confidence : {best['confidence']}")
     if best.get("salt_entropy") != "N/A":
         print(f" Salt entropy : {best['salt_entropy']:.3f} bits/byte")
-    print(f" Apparent payload : {best['length_bits']//8:,} bytes")
+    print(f" Apparent payload : {best['length_bits']//8:,} bytes ({best['depth']} bit(s) per sample)")
     print()
 
     if "High" in best["confidence"] or "Medium" in best["confidence"]:
@@ -359,6 +557,11 @@ def main():
     parser.add_argument("-stealth", action="store_true", help="Stealth mode: scatter header & payload, encrypt header, randomize LSBs")
     parser.add_argument("-noise-type", choices=["white", "pink"], default="white", help="Noise type for generated carrier (default: white)")
     parser.add_argument("-input-wav", help="Embed into existing WAV instead of generating noise")
+    parser.add_argument("-legacy-stealth", action="store_true", help="Decode stealth files from earlier versions (shuffled header/payload positions)")
+    parser.add_argument("-depth", type=int, choices=range(1, MAX_DEPTH + 1), default=1, help="LSBs embedded per sample, 1-4 (encode, default: 1)")
+    parser.add_argument("-channels", type=int, default=CHANNELS, help="Channels of the generated carrier (default: 1)")
+    parser.add_argument("-sample-bits", type=int, choices=[16, 24, 32], default=8 * SAMPLE_WIDTH, help="Bits per sample of the generated carrier (default: 16)")
+    parser.add_argument("-mmap", action="store_true", help="Memory-map WAVs instead of reading them into memory (large files)")
     args = parser.parse_args()
 
     if args.version:
@@ -375,15 +578,18 @@ def main():
                 data = f.read()
         else:
             sys.exit("[-] Need -stdin or -infile")
-        encode_data(data, args.wav, stealth=args.stealth, noise_type=args.noise_type, input_wav=args.input_wav)
+        if args.channels < 1:
+            sys.exit("[-] -channels must be at least 1")
+        encode_data(data, args.wav, stealth=args.stealth, noise_type=args.noise_type, input_wav=args.input_wav, mmap=args.mmap,
+                    depth=args.depth, channels=args.channels, width=args.sample_bits // 8)
     elif args.decode:
         if not args.wav:
             sys.exit("[-] -wav required")
-        decode_data(args.wav, stealth=args.stealth)
+        decode_data(args.wav, stealth=args.stealth, mmap=args.mmap, legacy=args.legacy_stealth)
     elif args.analyze:
         if not args.wav:
             sys.exit("[-] -wav required")
-        analyze_wav(args.wav)
+        analyze_wav(args.wav, mmap=args.mmap)
     else:
         parser.print_help()
 